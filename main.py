@@ -1,5 +1,10 @@
 import argparse
-from solver.solver import SAT
+import signal
+from solver.restart import RESTART_POLICIES
+from solver.cube import solve_cubes
+from solver.localSearch import solve_local_search
+from solver.portfolio import solve_portfolio
+from solver.solver import solve_file
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
@@ -18,6 +23,109 @@ if __name__ == '__main__':
         default="VSIDS",
         help='Decision Heuristic to be used (VSIDS or ORDERED)'
     )
+    parser.add_argument(
+        '-r',
+        '--restart',
+        default="LUBY",
+        help='Restart policy to be used (NONE, LUBY or GLUCOSE), default = LUBY'
+    )
+    parser.add_argument(
+        '--rephase',
+        action='store_true',
+        help='periodically reset the saved phases and decide with target phases'
+    )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=1,
+        help='number of solver processes; with more than one, a portfolio of diversified'
+        ' solvers sharing learned clauses is run instead of the chosen settings, default = 1'
+    )
+    parser.add_argument(
+        '-c',
+        '--cube-depth',
+        type=int,
+        default=0,
+        help='cube-and-conquer: split the formula into at most 2^CUBE_DEPTH cubes solved by'
+        ' JOBS processes, default = 0 (disabled)'
+    )
+    parser.add_argument(
+        '--chrono',
+        type=int,
+        default=None,
+        help='backtrack chronologically when a backjump would undo more than CHRONO levels'
+    )
+    parser.add_argument(
+        '--reuse-trail',
+        action='store_true',
+        help='keep the decisions that VSIDS would make again at restarts'
+    )
+    parser.add_argument(
+        '--local-search',
+        default=None,
+        choices=["only", "hybrid"],
+        help='run the probSAT local search (needs NumPy); "hybrid" then runs CDCL from the phases'
+        ' of its best assignment if it found no model'
+    )
+    parser.add_argument(
+        '--flips',
+        type=int,
+        default=100000,
+        help='flips of a try of the local search, default = 100000'
+    )
+    parser.add_argument(
+        '--tries',
+        type=int,
+        default=10,
+        help='tries of the local search, default = 10'
+    )
+    parser.add_argument(
+        '--preprocess',
+        action='store_true',
+        help='simplify the formula before search (subsumption, variable elimination, ...)'
+    )
+    parser.add_argument(
+        '--progress',
+        type=float,
+        default=None,
+        help='print a progress line every PROGRESS seconds while solving'
+    )
+    parser.add_argument(
+        '--proof',
+        default=None,
+        help='path of the binary DRAT proof to write (compressed if it ends with .gz, .xz or .bz2)'
+    )
+    parser.add_argument(
+        '--time-limit',
+        type=float,
+        default=None,
+        help='stop with UNKNOWN after TIME_LIMIT seconds'
+    )
+    parser.add_argument(
+        '--conflict-limit',
+        type=int,
+        default=None,
+        help='stop with UNKNOWN after CONFLICT_LIMIT conflicts'
+    )
+    parser.add_argument(
+        '--memory-limit',
+        type=int,
+        default=None,
+        help='stop with UNKNOWN when the process uses more than MEMORY_LIMIT megabytes'
+    )
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        help='check the model against the clauses of the file before reporting SAT'
+    )
+    parser.add_argument(
+        '--model-format',
+        default="dimacs",
+        choices=["dimacs", "bits", "json"],
+        help='format of the model written to results/: DIMACS "v" lines, packed bits or JSON,'
+        ' default = dimacs'
+    )
     parser.add_argument(
         '-p',
         '--path',
@@ -30,13 +138,52 @@ if __name__ == '__main__':
 
     is_log = args.log
     decider = args.decider
+    restart = args.restart
     path = args.path
 
     if is_log not in [True, False]:
         raise ValueError("The logging argument should be either True or False.")
     if decider not in ["VSIDS", "ORDERED"]:
         raise ValueError("The decider argument should be either VSIDS or ORDERED.")
+    if restart not in RESTART_POLICIES:
+        raise ValueError("The restart argument should be one of NONE, LUBY or GLUCOSE.")
+    if args.proof is not None and (args.jobs > 1 or args.cube_depth > 0
+                                   or args.local_search is not None):
+        parser.error("--proof cannot be used with -j, -c or --local-search, which write no proof")
+    if args.preprocess and args.local_search == "only":
+        parser.error("--preprocess cannot be used with --local-search only, which runs no CDCL")
+    if (args.chrono is not None or args.reuse_trail) and args.local_search == "only":
+        parser.error("--chrono and --reuse-trail cannot be used with --local-search only, "
+                     "which runs no CDCL")
+    if args.progress is not None and (args.cube_depth > 0 or args.local_search == "only"):
+        parser.error("--progress cannot be used with -c, which prints a line per solved cube, "
+                     "or with --local-search only, which runs no CDCL")
 
-    sat = SAT(is_log, decider)
-    sat.solve(path)
-    sat.stats.print_stats()
\ No newline at end of file
+    limits = {"conflicts": args.conflict_limit, "time": args.time_limit,
+              "memory": args.memory_limit * 1024 * 1024 if args.memory_limit else None}
+    if args.cube_depth > 0:
+        solve_cubes(path, depth=args.cube_depth, num_workers=args.jobs, decider=decider,
+                    restart_policy=restart, rephase=args.rephase, output_dir="results", verbose=True,
+                    limits=limits, verify=args.verify, model_format=args.model_format,
+                    preprocess=args.preprocess, chrono=args.chrono, reuse_trail=args.reuse_trail)
+    elif args.local_search is not None:
+        solve_local_search(path, hybrid=args.local_search == "hybrid", max_flips=args.flips,
+                           max_tries=args.tries, time_limit=args.time_limit, decider=decider,
+                           restart_policy=restart, rephase=args.rephase, output_dir="results",
+                           verbose=True, limits=limits, signals=(signal.SIGINT, signal.SIGTERM),
+                           verify=args.verify, model_format=args.model_format,
+                           preprocess=args.preprocess, chrono=args.chrono,
+                           reuse_trail=args.reuse_trail, progress=args.progress)
+    elif args.jobs > 1:
+        solve_portfolio(path, num_workers=args.jobs, output_dir="results", verbose=True,
+                        limits=limits, verify=args.verify, model_format=args.model_format,
+                        preprocess=args.preprocess, chrono=args.chrono,
+                        reuse_trail=args.reuse_trail, progress=args.progress)
+    else:
+        # Ctrl-C and SIGTERM end the search with UNKNOWN and its statistics
+        solve_file(path, decider, restart, args.rephase, output_dir="results",
+                   verbose=True, log=is_log, progress=args.progress, proof=args.proof,
+                   preprocess=args.preprocess, limits=limits,
+                   signals=(signal.SIGINT, signal.SIGTERM), verify=args.verify,
+                   model_format=args.model_format, chrono=args.chrono,
+                   reuse_trail=args.reuse_trail)
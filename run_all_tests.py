@@ -1,5 +1,7 @@
-from solver.solver import SAT
+from solver.localSearch import numpy, solve_local_search
+from solver.solver import SAT, solve_clauses, solve_file
 import os
+import tempfile
 
 deciders = ["VSIDS"]
 
@@ -10,11 +12,54 @@ def run_tests(root_dir):
             run_tests(root + "/" + dir_name)
         for filename in files:
             for decider in deciders:
-                sat = SAT(False, decider)
-                sat.solve(root + "/" + filename)
-                sat.stats.print_stats()
+                solve_file(root + "/" + filename, decider, output_dir="results", verbose=True)
         break
 
 
+def check_regressions():
+    """
+    Small formulas which were solved wrongly in the past, an
+    AssertionError is raised if one of them is again.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Clauses added before preprocessing a file keep their variables
+        path = os.path.join(tmp_dir, "added.cnf")
+        with open(path, "w") as cnf_file:
+            cnf_file.write("p cnf 3 2\n1 2 0\n-1 3 0\n")
+        sat = SAT(False, "VSIDS", preprocess=True)
+        sat.add_clause([-1])
+        sat.add_clause([-2])
+        assert sat.solve(path) == "UNSAT"
+        # Hybrid local search without any try seeds no phases
+        if numpy is not None:
+            path = os.path.join(tmp_dir, "empty.cnf")
+            with open(path, "w") as cnf_file:
+                cnf_file.write("p cnf 2 2\n1 2 0\n0\n")
+            assert solve_local_search(path, hybrid=True).status == "UNSAT"
+            path = os.path.join(tmp_dir, "tries.cnf")
+            with open(path, "w") as cnf_file:
+                cnf_file.write("p cnf 2 1\n1 2 0\n")
+            assert solve_local_search(path, hybrid=True, max_tries=0).status == "SAT"
+    # Variables only occurring in tautologies are still in the checked model
+    result = solve_clauses([[8, -8], [-6]], preprocess=True, verify=True)
+    assert result.status == "SAT" and 8 in result.model
+    # A search without conflicts stops at the limits and interruptions,
+    # which do not outlive the call to solve
+    sat = SAT(False, "VSIDS")
+    for var in range(1, 2000, 2):
+        sat.add_clause([var, var + 1])
+    sat.set_limits(time=0)
+    assert sat.solve() == "UNKNOWN" and sat.stats._stop_reason == "time"
+    sat.set_limits()
+    sat.interrupt()
+    assert sat.solve() == "UNKNOWN" and sat.stats._stop_reason == "interrupt"
+    assert sat.solve() == "SAT"
+    # Flat literals in any one-dimensional integer buffer
+    if numpy is not None:
+        result = solve_clauses(numpy.array([1, 2, 0, -1, 0], dtype=numpy.int32))
+        assert result.status == "SAT" and result.model == {1: False, 2: True}
+
+
 if __name__ == '__main__':
+    check_regressions()
     run_tests("test")
@@ -0,0 +1,207 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import traceback
+from multiprocessing.connection import wait
+
+from solver.restart import RESTART_POLICIES
+from solver.solver import solve_file
+
+# Extensions of the instances found in the directories given to the runner
+CNF_EXTENSIONS = (".cnf", ".cnf.gz", ".cnf.xz", ".cnf.bz2")
+
+
+def find_instances(paths):
+    """
+    Expand the directories among paths into the CNF files they contain,
+    recursively and in sorted order; other paths are kept as they are.
+    """
+    instances = []
+    for path in paths:
+        if not os.path.isdir(path):
+            instances.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            instances.extend(os.path.join(root, name) for name in sorted(files)
+                             if name.endswith(CNF_EXTENSIONS))
+    return instances
+
+
+def _peak_rss_kb(pid):
+    # High water mark of the resident set of a running process
+    try:
+        with open("/proc/{}/status".format(pid)) as status_file:
+            for line in status_file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _batch_worker(index, cnf_filename, config, memory_limit, proof_dir, connection):
+    if memory_limit is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    proof = None
+    if proof_dir is not None:
+        # The index keeps the names of instances with the same file name,
+        # or of the same instance run several times, apart
+        proof = os.path.join(proof_dir, "{}-{}.drat".format(index, os.path.basename(cnf_filename)))
+    try:
+        result = solve_file(cnf_filename, proof=proof, **config)
+        stats = result.stats
+        record = {
+            "status": result.status,
+            "read_time": stats._read_time - stats._start_time,
+            "solve_time": stats._complete_time - stats._read_time,
+            "decisions": stats._num_decisions,
+            "implications": stats._num_implications,
+            "propagations": stats._num_propagations,
+            "conflicts": stats._num_conflicts,
+            "learned_clauses": stats._num_learned_clauses,
+        }
+    except MemoryError:
+        record = {"status": "MEMOUT"}
+    except Exception:
+        record = {"status": "ERROR", "error": traceback.format_exc()}
+    # Kilobytes on Linux
+    record["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    connection.send(record)
+    connection.close()
+
+
+def run_batch(instances, jobs=None, timeout=None, memory_limit=None, output=None,
+              decider="VSIDS", restart_policy="LUBY", rephase=False, proof_dir=None, verify=False):
+    """
+    Solve every instance in its own process, with at most jobs processes
+    at a time. A process is killed when it exceeds the time limit, and a
+    process dying without a result does not stop the batch.
+
+    Parameters:
+        instances: paths of the CNF files
+        jobs: number of concurrent processes, by default the number of CPUs
+        timeout: wall-clock limit of an instance in seconds, None for none
+        memory_limit: address space limit of an instance in bytes
+        output: file object receiving one JSON line per instance, written
+                as soon as the instance is done
+        decider, restart_policy, rephase: the options of SAT
+        proof_dir: if given, the binary DRAT proof of every instance is
+                   written to proof_dir/<index>-<file name>.drat, where
+                   index is the position of the instance in instances
+        verify: whether to check every model against the clauses of its
+                instance, a wrong model giving the status ERROR
+
+    Return:
+        list of the records of the instances, in order of completion. A
+        record holds the file, the status (SAT, UNSAT, TIMEOUT, MEMOUT,
+        ERROR or CRASH), the wall-clock time and the peak RSS, and for
+        solved instances the reading and solving times, the numbers of
+        decisions, implications, propagations, conflicts and learned
+        clauses
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    config = {"decider": decider, "restart_policy": restart_policy, "rephase": rephase,
+              "verify": verify}
+    if proof_dir is not None and not os.path.isdir(proof_dir):
+        os.makedirs(proof_dir)
+    context = multiprocessing.get_context()
+    pending = list(reversed(list(enumerate(instances))))
+    # Receiving end of the pipe of every running process, mapped to the
+    # process, its instance and its start time
+    running = {}
+    records = []
+
+    def finish(connection, record):
+        process, cnf_filename, start = running.pop(connection)
+        connection.close()
+        process.join()
+        result = {"file": cnf_filename, "status": record.pop("status"),
+                  "time": time.time() - start}
+        result.update(record)
+        records.append(result)
+        if output is not None:
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+    while pending or running:
+        while pending and len(running) < jobs:
+            index, cnf_filename = pending.pop()
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_batch_worker,
+                                      args=(index, cnf_filename, config, memory_limit, proof_dir,
+                                            sender),
+                                      daemon=True)
+            process.start()
+            # Only the child holds the sending end, so its death is seen
+            # as the end of the pipe
+            sender.close()
+            running[receiver] = (process, cnf_filename, time.time())
+
+        wait_time = None
+        if timeout is not None:
+            first_start = min(start for process, cnf_filename, start in running.values())
+            wait_time = max(0, first_start + timeout - time.time())
+        for connection in wait(list(running), wait_time):
+            try:
+                record = connection.recv()
+            except EOFError:
+                process = running[connection][0]
+                process.join()
+                record = {"status": "CRASH", "exit_code": process.exitcode}
+            finish(connection, record)
+
+        if timeout is not None:
+            now = time.time()
+            for connection, (process, cnf_filename, start) in list(running.items()):
+                if now - start >= timeout:
+                    peak_rss_kb = _peak_rss_kb(process.pid)
+                    process.kill()
+                    finish(connection, {"status": "TIMEOUT", "peak_rss_kb": peak_rss_kb})
+    return records
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Solves many CNF files in parallel processes and writes one JSON line per file.'
+        ' Example usage: python -m solver.batch -j 4 -t 60 -o results.jsonl test'
+    )
+    parser.add_argument('paths', nargs='+', help='CNF files and directories searched for them')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of concurrent processes, default = number of CPUs')
+    parser.add_argument('-t', '--timeout', type=float, default=None,
+                        help='wall-clock limit of an instance in seconds')
+    parser.add_argument('-m', '--memory', type=int, default=None,
+                        help='memory limit of an instance in megabytes')
+    parser.add_argument('-o', '--output', default=None,
+                        help='JSONL file to write, default = standard output')
+    parser.add_argument('-d', '--decider', default="VSIDS",
+                        help='Decision Heuristic to be used (VSIDS or ORDERED)')
+    parser.add_argument('-r', '--restart', default="LUBY",
+                        help='Restart policy to be used (NONE, LUBY or GLUCOSE), default = LUBY')
+    parser.add_argument('--rephase', action='store_true',
+                        help='periodically reset the saved phases and decide with target phases')
+    parser.add_argument('--proof-dir', default=None,
+                        help='directory to write the binary DRAT proof of every instance to')
+    parser.add_argument('--verify', action='store_true',
+                        help='check every model against the clauses of its instance')
+    args = parser.parse_args()
+
+    if args.decider not in ["VSIDS", "ORDERED"]:
+        raise ValueError("The decider argument should be either VSIDS or ORDERED.")
+    if args.restart not in RESTART_POLICIES:
+        raise ValueError("The restart argument should be one of NONE, LUBY or GLUCOSE.")
+
+    memory_limit = args.memory * 1024 * 1024 if args.memory is not None else None
+    output = open(args.output, "w") if args.output is not None else sys.stdout
+    try:
+        run_batch(find_instances(args.paths), args.jobs, args.timeout, memory_limit, output,
+                  args.decider, args.restart, args.rephase, args.proof_dir, args.verify)
+    finally:
+        if output is not sys.stdout:
+            output.close()
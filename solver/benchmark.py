@@ -0,0 +1,214 @@
+import argparse
+import json
+import os
+import sys
+
+from solver.batch import find_instances, run_batch
+
+DECIDERS = ["VSIDS", "ORDERED"]
+# Metrics compared with the baseline, and whether larger values are better
+COMPARED_METRICS = {
+    "median_time": False,
+    "p90_time": False,
+    "props_per_sec": True,
+    "conflicts_per_sec": True,
+    "peak_rss_kb": False,
+}
+
+
+def find_families(root_dir):
+    """
+    Benchmark families of a test directory: every subdirectory is a family
+    named after it, and every CNF file directly in root_dir is a family
+    of its own named after the file.
+
+    Return:
+        dictionary of family name to the list of its instances
+    """
+    families = {}
+    for name in sorted(os.listdir(root_dir)):
+        path = os.path.join(root_dir, name)
+        if os.path.isdir(path):
+            instances = find_instances([path])
+        elif name.endswith(".cnf"):
+            instances = [path]
+            name = name[:-len(".cnf")]
+        else:
+            continue
+        if instances:
+            families[name] = instances
+    return families
+
+
+def percentile(values, q):
+    """
+    q-th percentile (0 to 100) of values, interpolating linearly between
+    the closest ranks.
+    """
+    values = sorted(values)
+    rank = (len(values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def summarize(records, timeout=None):
+    """
+    Metrics of the records of one family and one decider: solve time
+    percentiles (unsolved instances count as the timeout), the total
+    solving time of the solved instances, propagations and conflicts per
+    second of solving, and the peak RSS.
+    """
+    times = []
+    propagations = conflicts = 0
+    solve_time = 0.0
+    solved = 0
+    for record in records:
+        if record["status"] in ("SAT", "UNSAT"):
+            solved += 1
+            times.append(record["solve_time"])
+            solve_time += record["solve_time"]
+            propagations += record["propagations"]
+            conflicts += record["conflicts"]
+        else:
+            times.append(timeout if timeout is not None else record["time"])
+    return {
+        "runs": len(records),
+        "solved": solved,
+        "median_time": percentile(times, 50),
+        "p90_time": percentile(times, 90),
+        "max_time": max(times),
+        "solve_time": solve_time,
+        "props_per_sec": propagations / solve_time if solve_time > 0 else 0.0,
+        "conflicts_per_sec": conflicts / solve_time if solve_time > 0 else 0.0,
+        "peak_rss_kb": max(record.get("peak_rss_kb") or 0 for record in records),
+    }
+
+
+def run_benchmark(families, deciders=DECIDERS, trials=3, jobs=1, timeout=None,
+                  memory_limit=None, verbose=False, proof_dir=None):
+    """
+    Solve every family with every decider, trials times each.
+
+    Parameters:
+        families: dictionary of family name to the list of its instances
+        deciders: deciders to benchmark
+        trials: number of runs of every instance
+        jobs: number of concurrent solver processes, 1 for stable timings
+        timeout, memory_limit: limits of an instance, as in run_batch
+        verbose: whether to print the metrics of every family
+        proof_dir: if given, DRAT proofs are written there, to measure
+                   the overhead of proof logging
+
+    Return:
+        dictionary of decider to family name to the metrics of summarize
+    """
+    results = {}
+    for decider in deciders:
+        results[decider] = {}
+        for family, instances in families.items():
+            records = run_batch(instances * trials, jobs, timeout, memory_limit, decider=decider,
+                                proof_dir=proof_dir)
+            results[decider][family] = summarize(records, timeout)
+            if verbose:
+                print_metrics(decider, family, results[decider][family])
+    return results
+
+
+def print_metrics(decider, family, metrics):
+    print("{:8s} {:12s} solved {:4d}/{:<4d} median {:8.4f}s p90 {:8.4f}s "
+          "props/s {:10.0f} conflicts/s {:8.0f} peak RSS {:7d} KB".format(
+              decider, family, metrics["solved"], metrics["runs"], metrics["median_time"],
+              metrics["p90_time"], metrics["props_per_sec"], metrics["conflicts_per_sec"],
+              metrics["peak_rss_kb"]))
+
+
+def compare(results, baseline, threshold=0.1, min_time=0.01, min_solve_time=1.0):
+    """
+    Find the regressions of results with respect to baseline.
+
+    Parameters:
+        results, baseline: results of run_benchmark
+        threshold: relative change beyond which a metric regressed
+        min_time: time difference in seconds below which a time metric
+                  never regresses, to ignore the noise of tiny instances
+        min_solve_time: total solving time in seconds of a family, in the
+                        results or in the baseline, below which its rates
+                        (per second metrics) are not compared, being
+                        measured over too short a time
+
+    Return:
+        list of (decider, family, metric, baseline value, value)
+    """
+    regressions = []
+    for decider, families in results.items():
+        for family, metrics in families.items():
+            base = baseline.get(decider, {}).get(family)
+            if base is None:
+                continue
+            short = min(base.get("solve_time", 0.0), metrics["solve_time"]) < min_solve_time
+            for metric, larger_is_better in COMPARED_METRICS.items():
+                if metric.endswith("_per_sec") and short:
+                    continue
+                old, new = base[metric], metrics[metric]
+                if larger_is_better:
+                    regressed = new < old * (1 - threshold)
+                else:
+                    regressed = new > old * (1 + threshold)
+                    if metric.endswith("_time") and new - old < min_time:
+                        regressed = False
+                if regressed:
+                    regressions.append((decider, family, metric, old, new))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmarks the deciders over the instance families of a test directory.'
+        ' Example usage: python -m solver.benchmark --save-baseline baseline.json'
+    )
+    parser.add_argument('-t', '--test-dir', default="test", help='directory of the families')
+    parser.add_argument('-f', '--family', action='append',
+                        help='family to run (repeatable), default = all of them')
+    parser.add_argument('-d', '--decider', action='append',
+                        help='decider to run (repeatable), default = VSIDS and ORDERED')
+    parser.add_argument('-n', '--trials', type=int, default=3, help='runs of every instance')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='concurrent solver processes')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='wall-clock limit of an instance in seconds')
+    parser.add_argument('--proof-dir', default=None,
+                        help='write DRAT proofs to this directory while benchmarking')
+    parser.add_argument('--save-baseline', default=None, help='JSON file to write the results to')
+    parser.add_argument('--baseline', default=None, help='JSON file of results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative change flagged as a regression, default = 0.1')
+    parser.add_argument('--min-solve-time', type=float, default=1.0,
+                        help='seconds of solving of a family below which its rates are not'
+                        ' compared, default = 1.0')
+    args = parser.parse_args()
+
+    families = find_families(args.test_dir)
+    if args.family:
+        unknown = [name for name in args.family if name not in families]
+        if unknown:
+            raise ValueError("Unknown families: " + ", ".join(unknown))
+        families = {name: families[name] for name in args.family}
+    deciders = args.decider or DECIDERS
+    for decider in deciders:
+        if decider not in DECIDERS:
+            raise ValueError("The decider argument should be either VSIDS or ORDERED.")
+
+    results = run_benchmark(families, deciders, args.trials, args.jobs, args.timeout, verbose=True,
+                            proof_dir=args.proof_dir)
+    if args.save_baseline is not None:
+        with open(args.save_baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold,
+                                  min_solve_time=args.min_solve_time)
+        for decider, family, metric, old, new in regressions:
+            print("REGRESSION {} {} {}: {:.4f} -> {:.4f}".format(decider, family, metric, old, new))
+        if regressions:
+            sys.exit(1)
+        print("No regression beyond {:.0%}".format(args.threshold))
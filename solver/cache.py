@@ -0,0 +1,158 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from solver.dimacs import DimacsReader
+
+# Binary CNF cache layout (all integers in native byte order):
+#   header   magic, byte order, number of variables, number of clauses,
+#            number of literals, size, mtime and digest of the source
+#   offsets  int32[num_clauses + 1], start of every clause in literals
+#   literals int32[num_literals], DIMACS literals of all the clauses
+CACHE_SUFFIX = ".bcnf"
+MAGIC = b"SATCNF01"
+HEADER = struct.Struct("=8s8sqqqqq16s")
+# Number of bytes hashed at the start and at the end of the source file
+DIGEST_SAMPLE = 1 << 20
+
+
+def cache_path(cnf_filename):
+    """
+    Path of the binary cache belonging to a CNF file, next to it.
+    """
+    return cnf_filename + CACHE_SUFFIX
+
+
+def _source_key(cnf_filename):
+    """
+    Key identifying the current contents of a CNF file: its size, its
+    modification time and a digest of its first and last megabyte.
+    """
+    st = os.stat(cnf_filename)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(cnf_filename, "rb") as cnf_file:
+        digest.update(cnf_file.read(DIGEST_SAMPLE))
+        if st.st_size > DIGEST_SAMPLE:
+            cnf_file.seek(max(DIGEST_SAMPLE, st.st_size - DIGEST_SAMPLE))
+            digest.update(cnf_file.read())
+    return st.st_size, st.st_mtime_ns, digest.digest()
+
+
+def write_cache(cnf_filename, cache_filename=None):
+    """
+    Convert a (possibly compressed) DIMACS file into the binary format.
+
+    Parameters:
+        cnf_filename: path of the CNF file to convert
+        cache_filename: path of the binary file, by default the cache
+                        path next to the CNF file
+
+    Return:
+        the path of the written binary file
+    """
+    if cache_filename is None:
+        cache_filename = cache_path(cnf_filename)
+    offsets = array("i", [0])
+    literals = array("i")
+    with DimacsReader(cnf_filename) as reader:
+        num_vars, num_clauses = reader.read_header()
+        for clause in reader.clauses():
+            literals.extend(clause)
+            offsets.append(len(literals))
+    size, mtime_ns, digest = _source_key(cnf_filename)
+    byteorder = sys.byteorder.encode().ljust(8, b"\0")
+    tmp_filename = cache_filename + ".tmp"
+    with open(tmp_filename, "wb") as cache_file:
+        cache_file.write(HEADER.pack(MAGIC, byteorder, num_vars, len(offsets) - 1,
+                                     len(literals), size, mtime_ns, digest))
+        offsets.tofile(cache_file)
+        literals.tofile(cache_file)
+    os.replace(tmp_filename, cache_filename)
+    return cache_filename
+
+
+class CnfCache:
+    """
+    Memory-mapped binary CNF. The offsets and literals are memoryviews
+    into the mapping, so nothing is copied until clauses are read.
+    """
+
+    def __init__(self, cache_filename):
+        """
+        Constructor of the cache, maps the whole file into memory.
+
+        Parameters:
+            cache_filename: path of the binary CNF file
+
+        Return:
+            the initialized cache object
+        """
+        with open(cache_filename, "rb") as cache_file:
+            self._mmap = mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, byteorder, self.num_vars, self.num_clauses, num_literals,
+         self.source_size, self.source_mtime_ns, self.source_digest) = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or byteorder.rstrip(b"\0") != sys.byteorder.encode():
+            self._mmap.close()
+            raise ValueError("Not a binary CNF file for this machine: " + cache_filename)
+        start = HEADER.size
+        end = start + 4 * (self.num_clauses + 1)
+        self._view = memoryview(self._mmap)
+        self.offsets = self._view[start:end].cast("i")
+        self.literals = self._view[end:end + 4 * num_literals].cast("i")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # The views must be released before the mapping can be closed
+        self.offsets.release()
+        self.literals.release()
+        self._view.release()
+        self._mmap.close()
+
+    def is_fresh(self, cnf_filename):
+        """
+        Check that the cache still matches the CNF file it was made from.
+        """
+        key = _source_key(cnf_filename)
+        return key == (self.source_size, self.source_mtime_ns, self.source_digest)
+
+    def clauses(self):
+        """
+        Generator over the clauses, each one as a list of DIMACS literals.
+        """
+        offsets = self.offsets
+        literals = self.literals
+        for i in range(self.num_clauses):
+            yield literals[offsets[i]:offsets[i + 1]].tolist()
+
+
+def load_cache(cnf_filename):
+    """
+    Open the binary cache of a CNF file if it exists and is fresh.
+
+    Return:
+        a CnfCache, or None if there is no usable cache
+    """
+    cache_filename = cache_path(cnf_filename)
+    if not os.path.isfile(cache_filename):
+        return None
+    try:
+        cache = CnfCache(cache_filename)
+    except (ValueError, struct.error):
+        return None
+    if not cache.is_fresh(cnf_filename):
+        cache.close()
+        return None
+    return cache
+
+
+if __name__ == '__main__':
+    for filename in sys.argv[1:]:
+        print("Wrote", write_cache(filename))
@@ -0,0 +1,302 @@
+import math
+import multiprocessing
+import os
+import queue
+import time
+
+from solver.solver import SAT, SolveResult, check_model, to_dimacs, write_model_file
+
+
+class Lookahead:
+    """
+    Splits a formula into cubes with a lookahead on the unit propagation
+    of a SAT solver: at every node of the split tree, both polarities of
+    the candidate variables are propagated and the variable with the
+    largest product of the numbers of implied literals is branched on.
+    Branches refuted by propagation are dropped, so the formula is
+    equivalent to the disjunction of the cubes.
+    """
+
+    def __init__(self, sat, num_candidates=64):
+        """
+        Constructor of the lookahead.
+
+        Parameters:
+            sat: solver holding the formula, at level 0
+            num_candidates: number of variables occurring most often that
+                            are considered for branching
+
+        Return:
+            the initialized lookahead object
+        """
+        self._sat = sat
+        lit_scores = sat._lit_scores
+        variables = sorted(range(1, sat._num_vars + 1),
+                           key=lambda var: -(lit_scores[2 * var] + lit_scores[2 * var + 1]))
+        self._candidates = variables[:num_candidates]
+
+    def _propagate(self, literal):
+        """
+        Decide literal and propagate it.
+
+        Return:
+            the number of literals assigned, -1 on a conflict
+        """
+        sat = self._sat
+        size = len(sat._trail)
+        sat._new_decision(literal)
+        if sat._unit_propagate() != -1:
+            return -1
+        return len(sat._trail) - size
+
+    def _select(self):
+        """
+        Variable of the current node with the best lookahead score, or 0 if
+        all the candidates are assigned. A variable with a refuted polarity
+        is returned at once, as one of its branches is dropped.
+        """
+        sat = self._sat
+        values = sat._values
+        level = sat._level
+        best_var = 0
+        best_score = -1
+        for var in self._candidates:
+            if values[var] != -1:
+                continue
+            positive = self._propagate(2 * var)
+            sat._backtrack(level, -1, -1)
+            negative = self._propagate(2 * var + 1)
+            sat._backtrack(level, -1, -1)
+            if positive == -1 or negative == -1:
+                return var
+            score = (positive + 1) * (negative + 1)
+            if score > best_score:
+                best_score = score
+                best_var = var
+        return best_var
+
+    def cubes(self, depth):
+        """
+        Split the formula into at most 2 ** depth cubes.
+
+        Parameters:
+            depth: maximum number of decisions of a cube
+
+        Return:
+            list of cubes, each a list of DIMACS literals; an empty list
+            if the formula is refuted by the lookahead
+        """
+        sat = self._sat
+        if not sat._ok or sat._unit_propagate() != -1:
+            return []
+        cubes = []
+        self._split([], depth, cubes)
+        return cubes
+
+    def _split(self, cube, depth, cubes):
+        sat = self._sat
+        var = self._select() if depth > 0 else 0
+        if var == 0:
+            cubes.append([to_dimacs(lit) for lit in cube])
+            return
+        level = sat._level
+        for literal in (2 * var, 2 * var + 1):
+            if self._propagate(literal) != -1:
+                self._split(cube + [literal], depth - 1, cubes)
+            sat._backtrack(level, -1, -1)
+
+
+def _cube_worker(cnf_filename, clauses, config, limits, tasks, results):
+    # The solver of a worker is reused from cube to cube, keeping the
+    # clauses it learned
+    sat = SAT(False, **config)
+    if limits:
+        sat.set_limits(**limits)
+    if cnf_filename is not None:
+        sat._read_file(cnf_filename)
+    if clauses is not None:
+        for clause in clauses:
+            if not sat.add_clause(clause):
+                break
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        results.put(_solve_cube(sat, task))
+
+
+def _solve_cube(sat, task):
+    index, cube = task
+    stats = sat.stats
+    learned = stats._num_learned_clauses
+    conflicts = stats._num_conflicts
+    decisions = stats._num_decisions
+    start = time.time()
+    status = sat.solve(assumptions=cube)
+    report = {
+        "cube": index,
+        "literals": cube,
+        "status": status,
+        "worker": os.getpid(),
+        "time": time.time() - start,
+        "conflicts": stats._num_conflicts - conflicts,
+        "decisions": stats._num_decisions - decisions,
+        "learned": stats._num_learned_clauses - learned,
+        "stop_reason": stats._stop_reason,
+        # The formula itself is UNSAT, whatever the cube
+        "refuted": not sat._ok,
+    }
+    return report, sat.get_model()
+
+
+def print_cube_report(report, done, total):
+    """
+    Print one progress line for a solved cube.
+    """
+    print("cube {:5d} [{}/{}] {:6s} worker {} {:.3f}s conflicts {} decisions {}".format(
+        report["cube"], done, total, report["status"], report["worker"], report["time"],
+        report["conflicts"], report["decisions"]))
+
+
+def solve_cubes(cnf_filename=None, clauses=None, depth=None, num_workers=None,
+                decider="VSIDS", restart_policy="LUBY", rephase=False,
+                progress=None, output_dir=None, verbose=False, limits=None, verify=False,
+                model_format="dimacs", preprocess=False, chrono=None, reuse_trail=False):
+    """
+    Cube-and-conquer: split the formula into cubes with a lookahead, then
+    solve the cubes as assumptions in worker processes. The
+    formula is SAT as soon as a cube is SAT, and UNSAT when all are.
+    Every worker takes the next unsolved cube when it is done with one.
+
+    Parameters:
+        cnf_filename: path of the DIMACS file
+        clauses: clauses (lists of DIMACS literals) solved with, or
+                 instead of, the file
+        depth: maximum number of decisions of a cube, by default enough
+               for about 8 cubes per worker
+        num_workers: number of processes, by default the number of CPUs
+        decider, restart_policy, rephase, preprocess, chrono, reuse_trail:
+            the options of SAT;
+            the lookahead and the workers preprocess the formula the same
+            way, and the cubes only have variables which are not
+            eliminated
+        progress: called after every cube with a report dictionary (cube,
+                  literals, status, worker, time, conflicts, decisions,
+                  learned, refuted), the number of solved cubes and the
+                  number of cubes; print_cube_report when verbose
+        output_dir, verbose: as in solve_file
+        limits: dictionary of the arguments of SAT.set_limits, applied to
+                every cube (the memory one to each process); the time and
+                conflict limits also bound the whole run. The result is
+                UNKNOWN when no cube is SAT and a limit stopped a cube or
+                the run
+        verify: whether to check the model against the clauses before
+                returning SAT, see check_model
+        model_format: format of the model file, see write_model
+
+    Return:
+        a SolveResult
+    """
+    limits = limits or {}
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if depth is None:
+        depth = max(1, math.ceil(math.log2(8 * num_workers)))
+    if progress is None and verbose:
+        progress = print_cube_report
+    if clauses is not None:
+        clauses = [list(clause) for clause in clauses]
+    config = {"decider": decider, "restart_policy": restart_policy, "rephase": rephase,
+              "preprocess": preprocess, "chrono": chrono, "reuse_trail": reuse_trail}
+
+    # The lookahead solver also provides the statistics of the result, and
+    # the clauses the model is checked against
+    sat = SAT(False, verify=verify, **config)
+    stats = sat.stats
+    stats._start_time = time.time()
+    deadline = None
+    if limits.get("time") is not None:
+        deadline = stats._start_time + limits["time"]
+    if cnf_filename is not None:
+        stats._input_file = cnf_filename
+        sat._read_file(cnf_filename)
+    if clauses is not None:
+        for clause in clauses:
+            if not sat.add_clause(clause):
+                break
+    stats._read_time = time.time()
+    stats._num_vars = sat._num_vars
+    stats._num_clauses = sat._num_clauses
+    cubes = Lookahead(sat).cubes(depth)
+    if verbose:
+        print("Split into {} cubes in {:.3f}s".format(len(cubes), time.time() - stats._read_time))
+
+    status = "UNSAT"
+    model = None
+    stop_reason = ""
+    if cubes:
+        context = multiprocessing.get_context()
+        tasks = context.Queue()
+        results = context.Queue()
+        for task in enumerate(cubes):
+            tasks.put(task)
+        for i in range(num_workers):
+            tasks.put(None)
+        workers = [context.Process(target=_cube_worker,
+                                   args=(cnf_filename, clauses, config, limits, tasks, results),
+                                   daemon=True)
+                   for i in range(num_workers)]
+        for worker in workers:
+            worker.start()
+        try:
+            done = 0
+            while done < len(cubes):
+                if deadline is not None and time.time() >= deadline:
+                    stop_reason = "time"
+                    break
+                try:
+                    report, cube_model = results.get(timeout=0.1)
+                except queue.Empty:
+                    if not any(worker.is_alive() for worker in workers) and results.empty():
+                        raise RuntimeError("All the cube workers stopped before solving every cube")
+                    continue
+                done += 1
+                stats._num_conflicts += report["conflicts"]
+                stats._num_decisions += report["decisions"]
+                stats._num_learned_clauses += report["learned"]
+                if progress is not None:
+                    progress(report, done, len(cubes))
+                if report["status"] == "SAT":
+                    status = "SAT"
+                    model = cube_model
+                    break
+                if report["refuted"]:
+                    stop_reason = ""
+                    break
+                if report["status"] == "UNKNOWN":
+                    stop_reason = report["stop_reason"]
+                if (limits.get("conflicts") is not None
+                        and stats._num_conflicts >= limits["conflicts"]):
+                    stop_reason = "conflicts"
+                    break
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+            for worker in workers:
+                worker.join()
+    if status != "SAT" and stop_reason:
+        status = "UNKNOWN"
+        stats._stop_reason = stop_reason
+    if verify and status == "SAT":
+        check_model(sat._original_literals, model, stats)
+    stats._result = status
+    stats._complete_time = time.time()
+
+    if output_dir is not None and status == "SAT" and cnf_filename is not None:
+        stats._output_assignment_file = write_model_file(cnf_filename, model, output_dir,
+                                                         model_format)
+    if verbose:
+        print(status)
+        stats.print_stats()
+    return SolveResult(status, model, stats)
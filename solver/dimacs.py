@@ -0,0 +1,157 @@
+import bz2
+import gzip
+import lzma
+
+# Openers for the compressed inputs, selected by file extension
+COMPRESSED_OPENERS = {
+    ".gz": gzip.open,
+    ".xz": lzma.open,
+    ".bz2": bz2.open,
+}
+
+
+def open_cnf(path, mode="rb"):
+    """
+    Open a (possibly compressed) CNF file.
+
+    Parameters:
+        path: path of the file, compression is chosen from the extension
+              (.gz, .xz or .bz2), any other file is opened as is
+        mode: mode in which the file is opened
+
+    Return:
+        the opened file object
+    """
+    for extension, opener in COMPRESSED_OPENERS.items():
+        if path.endswith(extension):
+            return opener(path, mode)
+    return open(path, mode)
+
+
+class DimacsReader:
+    """
+    Streaming reader of DIMACS CNF files. The input is read in large
+    chunks cut at line boundaries and every chunk is tokenized at once,
+    so clauses may span lines and a line may hold several clauses.
+    """
+
+    def __init__(self, path, chunk_size=1 << 20):
+        """
+        Constructor of the reader.
+
+        Parameters:
+            path: path of the .cnf file (optionally .cnf.gz, .cnf.xz
+                  or .cnf.bz2)
+            chunk_size: number of bytes read from the file at once
+
+        Return:
+            the initialized reader object
+        """
+        self.num_vars = 0
+        self.num_clauses = 0
+        self._file = open_cnf(path)
+        self._chunk_size = chunk_size
+        self._chunks = self._read_chunks()
+        # Part of the chunk holding the header that follows it
+        self._pending = b""
+        self._finished = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def _read_chunks(self):
+        """
+        Generator over the contents of the file in chunks which always
+        end at the end of a line.
+        """
+        rest = b""
+        while True:
+            data = self._file.read(self._chunk_size)
+            if not data:
+                if rest:
+                    yield rest
+                return
+            if rest:
+                data = rest + data
+            cut = data.rfind(b"\n") + 1
+            if cut == 0:
+                rest = data
+                continue
+            rest = data[cut:]
+            yield data[:cut]
+
+    def read_header(self):
+        """
+        Read the file up to and including the "p cnf" line.
+
+        Return:
+            the pair (number of variables, number of clauses)
+        """
+        for chunk in self._chunks:
+            start = 0
+            while start < len(chunk):
+                end = chunk.find(b"\n", start)
+                if end == -1:
+                    end = len(chunk)
+                line = chunk[start:end]
+                start = end + 1
+                words = line.split()
+                if not words or words[0].startswith(b"c"):
+                    continue
+                if words[0] != b"p" or len(words) < 4 or words[1] != b"cnf":
+                    raise ValueError("Expected the 'p cnf' header line, got: "
+                                     + repr(line.decode()))
+                self.num_vars = int(words[2])
+                self.num_clauses = int(words[3])
+                self._pending = chunk[start:]
+                return self.num_vars, self.num_clauses
+        raise ValueError("The file does not contain a 'p cnf' header line.")
+
+    def _tokens(self, chunk):
+        """
+        Tokenize a chunk into its integers, dropping the comment lines.
+        The SATLIB end marker "%" stops the reading.
+        """
+        if b"c" not in chunk and b"%" not in chunk:
+            return chunk.split()
+        tokens = []
+        for line in chunk.split(b"\n"):
+            line = line.lstrip()
+            if line.startswith(b"c"):
+                continue
+            if line.startswith(b"%"):
+                self._finished = True
+                break
+            tokens.extend(line.split())
+        return tokens
+
+    def clauses(self):
+        """
+        Generator over the clauses following the header, each one as a
+        list of non-zero DIMACS literals.
+        """
+        clause = []
+        chunk = self._pending
+        self._pending = b""
+        chunks = self._chunks
+        while True:
+            for lit in map(int, self._tokens(chunk)):
+                if lit == 0:
+                    yield clause
+                    clause = []
+                else:
+                    clause.append(lit)
+            if self._finished:
+                break
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+        # Accept a last clause that misses its terminating zero
+        if clause:
+            yield clause
@@ -0,0 +1,91 @@
+from solver.dimacs import COMPRESSED_OPENERS
+
+# First byte of the steps of binary proofs
+ADD = ord("a")
+DELETE = ord("d")
+
+
+class DratWriter:
+    """
+    Writer of DRAT proofs. Lemmas and deletions are encoded into a large
+    buffer which is written out when full. In the binary format, a step is
+    the byte "a" (addition) or "d" (deletion) followed by the literals,
+    each one mapped to 2 * var for var and 2 * var + 1 for -var (the
+    internal encoding of the solver) and written as a variable-length
+    integer of 7-bit groups, low group first, and a terminating 0 byte.
+    """
+
+    def __init__(self, path, binary=True, buffer_size=1 << 20):
+        """
+        Constructor of the writer.
+
+        Parameters:
+            path: path of the proof file, compressed when it ends with
+                  .gz, .xz or .bz2
+            binary: whether to write the binary format rather than text
+            buffer_size: number of bytes buffered before writing
+
+        Return:
+            the initialized writer object
+        """
+        self._file = None
+        for extension, opener in COMPRESSED_OPENERS.items():
+            if path.endswith(extension):
+                self._file = opener(path, "wb")
+        if self._file is None:
+            self._file = open(path, "wb")
+        self._binary = binary
+        self._buffer = bytearray()
+        self._buffer_size = buffer_size
+        self.num_added = 0
+        self.num_deleted = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write(self, step, literals):
+        buffer = self._buffer
+        if self._binary:
+            buffer.append(step)
+            for lit in literals:
+                while lit > 127:
+                    buffer.append(128 | (lit & 127))
+                    lit >>= 7
+                buffer.append(lit)
+            buffer.append(0)
+        else:
+            if step == DELETE:
+                buffer += b"d "
+            buffer += " ".join(str(-(lit >> 1) if lit & 1 else lit >> 1) for lit in literals).encode()
+            buffer += b" 0\n" if literals else b"0\n"
+        if len(buffer) >= self._buffer_size:
+            self.flush()
+
+    def add(self, literals):
+        """
+        Log the addition of a lemma.
+
+        Parameters:
+            literals: the literals of the lemma in the internal encoding,
+                      an empty list for the empty clause
+        """
+        self.num_added += 1
+        self._write(ADD, literals)
+
+    def delete(self, literals):
+        """
+        Log the deletion of a clause, given as internal literals.
+        """
+        self.num_deleted += 1
+        self._write(DELETE, literals)
+
+    def flush(self):
+        self._file.write(self._buffer)
+        del self._buffer[:]
+
+    def close(self):
+        self.flush()
+        self._file.close()
@@ -0,0 +1,348 @@
+import random
+import signal
+import time
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from solver.cache import load_cache
+from solver.dimacs import DimacsReader
+from solver.solver import SAT, SolveResult, Statistics, check_model, write_model_file
+
+# Break constant cb of the polynomial probSAT distribution, by clause size
+# (values tuned for uniform random k-SAT by Balint and Schoening)
+BREAK_CONSTANTS = {3: 2.38, 4: 3.0, 5: 3.7, 6: 5.1, 7: 5.4}
+
+
+class LocalSearch:
+    """
+    probSAT stochastic local search. Starting from a random assignment,
+    a variable of a random falsified clause is flipped until no clause
+    is falsified, the variable being chosen with a probability decreasing
+    polynomially with its break value (the number of clauses it would
+    falsify). The clauses are NumPy arrays: flat literals, the clause of
+    every literal and the occurrences of every literal, in the 2v / 2v+1
+    encoding. Per clause, the number of true literals and the sum of the
+    variables of the true literals (the variable of the only true literal
+    when there is one) are maintained incrementally with the break values,
+    so a flip only touches the clauses of the flipped variable.
+    """
+
+    def __init__(self, clauses, num_vars=0, seed=None, cb=None, eps=1.0):
+        """
+        Constructor of the local search.
+
+        Parameters:
+            clauses: iterable of clauses, each an iterable of DIMACS literals
+            num_vars: number of variables, at least the largest one of the
+                      clauses
+            seed: seed of the random choices
+            cb, eps: parameters of the probability (eps + break) ** -cb of
+                     a variable, cb by default from BREAK_CONSTANTS
+
+        Return:
+            the initialized local search object
+        """
+        if numpy is None:
+            raise ImportError("The local search needs NumPy")
+        literals = array("i")
+        sizes = array("i")
+        self.has_empty_clause = False
+        for clause in clauses:
+            # Repeated literals are dropped, tautologies are always true
+            clause = set(clause)
+            if any(-lit in clause for lit in clause):
+                continue
+            if not clause:
+                self.has_empty_clause = True
+                continue
+            literals.extend(clause)
+            sizes.append(len(clause))
+        lits = numpy.array(literals, dtype=numpy.int64)
+        self._sizes = numpy.array(sizes, dtype=numpy.int64)
+        self._vars = numpy.abs(lits)
+        self._positive = lits > 0
+        self.num_vars = max(num_vars, int(self._vars.max()) if len(lits) else 0)
+        self.num_clauses = len(self._sizes)
+        self._starts = numpy.concatenate(([0], numpy.cumsum(self._sizes)[:-1])).astype(numpy.int64)
+        # Occurrences of the literal code c (2v or 2v+1) are the clauses
+        # occurrences[occurrence_starts[c]:occurrence_starts[c + 1]]
+        codes = 2 * self._vars + (~self._positive)
+        clause_of = numpy.repeat(numpy.arange(self.num_clauses), self._sizes)
+        order = numpy.argsort(codes, kind="stable")
+        self._occurrences = clause_of[order]
+        self._occurrence_starts = numpy.searchsorted(codes[order],
+                                                     numpy.arange(2 * self.num_vars + 3))
+        # The clause variables as Python lists, for the choice of a flip
+        self._clause_vars = [self._vars[start:start + size].tolist()
+                             for start, size in zip(self._starts.tolist(), sizes)]
+        if cb is None:
+            size = int(self._sizes.max()) if self.num_clauses else 3
+            cb = BREAK_CONSTANTS.get(size, 2.38 if size < 3 else 5.4)
+        # Probability weight of every break value up to the largest
+        # possible one, the number of occurrences of a literal
+        max_break = int(numpy.diff(self._occurrence_starts).max()) if self.num_clauses else 0
+        self._weights = [(eps + b) ** -cb for b in range(max_break + 1)]
+        self._random = random.Random(seed)
+        self._numpy_random = numpy.random.default_rng(seed)
+
+        self.num_flips = 0
+        self.num_tries = 0
+        self._values = None
+        self._model = None
+        self._best_values = None
+        self.best_num_unsat = self.num_clauses + 1
+
+    def _start(self):
+        # Random assignment, and the counters computed from scratch
+        values = self._numpy_random.random(self.num_vars + 1) < 0.5
+        values[0] = False
+        is_true = values[self._vars] == self._positive
+        self._values = values
+        if not self.num_clauses:
+            self._num_true = numpy.zeros(0, dtype=numpy.int64)
+            self._true_sum = numpy.zeros(0, dtype=numpy.int64)
+            self._breaks = numpy.zeros(self.num_vars + 1, dtype=numpy.int64)
+            self._unsat = []
+            self._unsat_pos = array("i")
+            return
+        self._num_true = numpy.add.reduceat(is_true.astype(numpy.int64), self._starts)
+        self._true_sum = numpy.add.reduceat(self._vars * is_true, self._starts)
+        self._breaks = numpy.bincount(self._true_sum[self._num_true == 1],
+                                      minlength=self.num_vars + 1)
+        # Falsified clauses, and the position of every clause in the list
+        self._unsat = numpy.flatnonzero(self._num_true == 0).tolist()
+        self._unsat_pos = array("i", [-1]) * self.num_clauses
+        for pos, clause in enumerate(self._unsat):
+            self._unsat_pos[clause] = pos
+
+    def _remove_unsat(self, clauses):
+        unsat = self._unsat
+        unsat_pos = self._unsat_pos
+        for clause in clauses:
+            last = unsat.pop()
+            if last != clause:
+                pos = unsat_pos[clause]
+                unsat[pos] = last
+                unsat_pos[last] = pos
+
+    def _add_unsat(self, clauses):
+        unsat = self._unsat
+        unsat_pos = self._unsat_pos
+        for clause in clauses:
+            unsat_pos[clause] = len(unsat)
+            unsat.append(clause)
+
+    def _flip(self, var):
+        value = bool(self._values[var])
+        self._values[var] = not value
+        # Code of the literal of var becoming true, then false
+        true_code = 2 * var + value
+        false_code = true_code ^ 1
+        occurrences = self._occurrences
+        starts = self._occurrence_starts
+        num_true = self._num_true
+        true_sum = self._true_sum
+        breaks = self._breaks
+
+        clauses = occurrences[starts[true_code]:starts[true_code + 1]]
+        num_true[clauses] += 1
+        true_sum[clauses] += var
+        counts = num_true[clauses]
+        # Satisfied now, by var alone
+        satisfied = clauses[counts == 1]
+        breaks[var] += len(satisfied)
+        self._remove_unsat(satisfied.tolist())
+        # The previous only true literal is no longer alone
+        numpy.subtract.at(breaks, true_sum[clauses[counts == 2]] - var, 1)
+
+        clauses = occurrences[starts[false_code]:starts[false_code + 1]]
+        num_true[clauses] -= 1
+        true_sum[clauses] -= var
+        counts = num_true[clauses]
+        falsified = clauses[counts == 0]
+        breaks[var] -= len(falsified)
+        self._add_unsat(falsified.tolist())
+        numpy.add.at(breaks, true_sum[clauses[counts == 1]], 1)
+
+    def solve(self, max_flips=100000, max_tries=10, time_limit=None):
+        """
+        Search for a model, restarting from a new random assignment every
+        max_flips flips.
+
+        Parameters:
+            max_flips: number of flips of a try
+            max_tries: number of tries
+            time_limit: maximum number of seconds, None for no limit
+
+        Return:
+            "SAT", or "UNKNOWN" if no model was found
+        """
+        self._model = None
+        if self.has_empty_clause:
+            return "UNKNOWN"
+        deadline = time.time() + time_limit if time_limit is not None else None
+        rand = self._random.random
+        weights = self._weights
+        for i in range(max_tries):
+            self.num_tries += 1
+            self._start()
+            breaks = self._breaks
+            unsat = self._unsat
+            for flip in range(max_flips + 1):
+                if len(unsat) < self.best_num_unsat:
+                    self.best_num_unsat = len(unsat)
+                    self._best_values = self._values.copy()
+                if not unsat:
+                    self._model = self._values
+                    return "SAT"
+                if flip == max_flips or (deadline is not None and flip & 1023 == 0
+                                         and time.time() >= deadline):
+                    break
+                clause_vars = self._clause_vars[unsat[int(rand() * len(unsat))]]
+                clause_weights = [weights[breaks[var]] for var in clause_vars]
+                threshold = rand() * sum(clause_weights)
+                for var, weight in zip(clause_vars, clause_weights):
+                    threshold -= weight
+                    if threshold < 0:
+                        break
+                self._flip(var)
+                self.num_flips += 1
+            if deadline is not None and time.time() >= deadline:
+                break
+        return "UNKNOWN"
+
+    def get_model(self):
+        """
+        Return:
+            dictionary of every variable to its boolean value in the
+            model found by the last call to solve, None if it was not SAT
+        """
+        if self._model is None:
+            return None
+        return {var: bool(value) for var, value in enumerate(self._model.tolist()) if var}
+
+    def get_best_assignment(self):
+        """
+        Return:
+            dictionary of every variable to its boolean value in the
+            assignment falsifying the fewest clauses seen so far, None
+            before the first call to solve
+        """
+        if self._best_values is None:
+            return None
+        return {var: bool(value) for var, value in enumerate(self._best_values.tolist()) if var}
+
+
+def _read_clauses(cnf_filename):
+    cache = load_cache(cnf_filename)
+    if cache is not None:
+        with cache:
+            return cache.num_vars, list(cache.clauses())
+    with DimacsReader(cnf_filename) as reader:
+        num_vars = reader.read_header()[0]
+        return num_vars, list(reader.clauses())
+
+
+def solve_local_search(cnf_filename, hybrid=False, max_flips=100000, max_tries=10,
+                       time_limit=None, seed=None, decider="VSIDS", restart_policy="LUBY",
+                       rephase=False, output_dir=None, verbose=False, limits=None, signals=(),
+                       verify=False, model_format="dimacs", preprocess=False, chrono=None,
+                       reuse_trail=False, progress=None):
+    """
+    Solve a DIMACS file with the local search. A hybrid run then solves the
+    formula with CDCL if the local search failed, starting from the phases
+    of the best assignment of the local search: CDCL is complete, and the
+    local search is only the fast path for satisfiable formulas.
+
+    Parameters:
+        cnf_filename: path of the (possibly compressed) DIMACS file
+        hybrid: whether to run CDCL after an unsuccessful local search
+        max_flips, max_tries, time_limit: the limits of LocalSearch.solve
+        seed: seed of the local search
+        decider, restart_policy, rephase, preprocess, chrono, reuse_trail:
+            the options of SAT in hybrid runs, the local search itself is run on the original
+            formula
+        output_dir, verbose: as in solve_file
+        progress: as in solve_file, for the CDCL run of hybrid runs
+        limits: dictionary of the arguments of SAT.set_limits, applied to
+                the CDCL run of hybrid runs; its time limit also counts
+                the reading and the local search
+        signals: as in solve_file, interrupting the CDCL run of hybrid runs
+        verify: whether to check the model against the clauses before
+                returning SAT, see check_model
+        model_format: format of the model file, see write_model
+
+    Return:
+        a SolveResult, whose status is "UNKNOWN" when only the local search
+        was run and it found no model
+    """
+    if hybrid:
+        sat = SAT(False, decider, restart_policy, rephase, preprocess=preprocess, chrono=chrono,
+                  reuse_trail=reuse_trail)
+        if progress is not None:
+            sat.set_progress(progress)
+        stats = sat.stats
+    else:
+        stats = Statistics()
+    stats._start_time = time.time()
+    stats._input_file = cnf_filename
+    num_vars, clauses = _read_clauses(cnf_filename)
+    stats._read_time = time.time()
+
+    local_search = LocalSearch(clauses, num_vars, seed)
+    status = local_search.solve(max_flips, max_tries, time_limit)
+    model = local_search.get_model()
+    stats._num_flips = local_search.num_flips
+    stats._local_search_time = time.time() - stats._read_time
+    if verbose:
+        print("Local search: {} in {} flips, {} tries, {:.3f}s".format(
+            status, local_search.num_flips, local_search.num_tries, stats._local_search_time))
+
+    if status != "SAT" and hybrid:
+        sat._load_clauses(num_vars, len(clauses), clauses)
+        # No assignment when no try was made (no tries, or an empty clause)
+        best_assignment = local_search.get_best_assignment()
+        if best_assignment is not None:
+            sat.set_phases(best_assignment)
+        if limits:
+            limits = dict(limits)
+            if limits.get("time") is not None:
+                limits["time"] = max(0, limits["time"] - (time.time() - stats._start_time))
+            sat.set_limits(**limits)
+        # The statistics of CDCL also count the local search and reading
+        start_time = stats._start_time
+        read_time = stats._read_time
+        handlers = {signum: signal.signal(signum, lambda signum, frame: sat.interrupt())
+                    for signum in signals}
+        try:
+            status = sat.solve()
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        stats._start_time = start_time
+        stats._read_time = read_time
+        model = sat.get_model()
+    stats._num_vars = num_vars
+    stats._num_orig_clauses = len(clauses)
+    if not hybrid:
+        stats._num_clauses = len(clauses)
+    if verify and status == "SAT":
+        literals = array("i")
+        for clause in clauses:
+            literals.extend(clause)
+            literals.append(0)
+        check_model(literals, model, stats)
+    stats._result = status
+    stats._complete_time = time.time()
+
+    if output_dir is not None and status == "SAT":
+        stats._output_assignment_file = write_model_file(cnf_filename, model, output_dir,
+                                                         model_format)
+    if verbose:
+        print(status)
+        stats.print_stats()
+    return SolveResult(status, model, stats)
@@ -0,0 +1,137 @@
+import json
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Formats of the model files, and the extension of their files
+MODEL_FORMATS = {"dimacs": ".txt", "bits": ".bits", "json": ".txt"}
+# Maximum length of a "v" line of the DIMACS format
+LINE_LENGTH = 78
+
+
+def model_values(model, num_vars=0):
+    """
+    Values of a model as bytes indexed by variable, 1 for True and 0 for
+    False (and for the variables missing from the model).
+
+    Parameters:
+        model: dictionary of variable to boolean value
+        num_vars: the values go at least up to this variable
+    """
+    values = bytearray(max(max(model, default=0), num_vars) + 1)
+    for var, value in model.items():
+        if value:
+            values[var] = 1
+    return values
+
+
+def write_model(path, model, model_format="dimacs", buffer_size=1 << 16):
+    """
+    Write a model through a large buffer.
+
+    Parameters:
+        path: path of the file to write
+        model: dictionary of variable to boolean value
+        model_format: "dimacs" for the "s SATISFIABLE" line followed by "v"
+                      lines of literals terminated by 0, as written by
+                      SAT competition solvers; "bits" for the values packed
+                      8 variables per byte, variable v being the bit v % 8
+                      (least significant first) of byte v // 8; "json" for
+                      the dictionary dumped as JSON
+        buffer_size: number of bytes buffered before writing
+    """
+    if model_format not in MODEL_FORMATS:
+        raise ValueError("The model format must be one of " + ", ".join(MODEL_FORMATS))
+    with open(path, "wb", buffering=buffer_size) as model_file:
+        if model_format == "bits":
+            bits = bytearray(max(model, default=0) // 8 + 1)
+            for var, value in model.items():
+                if value:
+                    bits[var >> 3] |= 1 << (var & 7)
+            model_file.write(bits)
+        elif model_format == "json":
+            model_file.write(json.dumps(model).encode())
+        else:
+            model_file.write(b"s SATISFIABLE\n")
+            line = ["v"]
+            length = 1
+            for var in sorted(model):
+                token = str(var) if model[var] else str(-var)
+                if length + len(token) + 1 > LINE_LENGTH:
+                    model_file.write((" ".join(line) + "\n").encode())
+                    line = ["v"]
+                    length = 1
+                line.append(token)
+                length += len(token) + 1
+            line.append("0")
+            model_file.write((" ".join(line) + "\n").encode())
+
+
+def read_model(path, model_format="dimacs"):
+    """
+    Read a model written by write_model in the "dimacs" or "bits" format.
+
+    Return:
+        dictionary of variable to boolean value; with the "bits" format,
+        the file does not record the number of variables, so every
+        variable up to the end of the last byte is present
+    """
+    model = {}
+    if model_format == "bits":
+        with open(path, "rb") as model_file:
+            bits = model_file.read()
+        for var in range(1, 8 * len(bits)):
+            model[var] = bool(bits[var >> 3] >> (var & 7) & 1)
+        return model
+    with open(path) as model_file:
+        for line in model_file:
+            if line.startswith("v"):
+                for lit in map(int, line.split()[1:]):
+                    if lit != 0:
+                        model[abs(lit)] = lit > 0
+    return model
+
+
+def verify_model(literals, model):
+    """
+    Check a model against clauses, vectorized with NumPy when it is
+    installed.
+
+    Parameters:
+        literals: flat sequence of DIMACS literals (array("i"), list...)
+                  with every clause terminated by 0
+        model: dictionary of variable to boolean value, the variables
+               missing from it are False
+
+    Return:
+        the index of the first clause falsified by the model, -1 if the
+        model satisfies all of them
+    """
+    if numpy is not None:
+        if not len(literals):
+            return -1
+        lits = numpy.asarray(literals, dtype=numpy.int32)
+        variables = numpy.abs(lits)
+        values = model_values(model, int(variables.max()))
+        is_true = numpy.frombuffer(bytes(values), dtype=numpy.uint8)[variables] == (lits > 0)
+        # The terminating zeros are false and end every segment
+        is_true &= lits != 0
+        ends = numpy.flatnonzero(lits == 0)
+        starts = numpy.concatenate(([0], ends[:-1] + 1))
+        falsified = numpy.flatnonzero(~numpy.logical_or.reduceat(is_true, starts))
+        return int(falsified[0]) if len(falsified) else -1
+
+    values = model_values(model, max(map(abs, literals), default=0))
+    clause_index = 0
+    satisfied = False
+    for lit in literals:
+        if lit == 0:
+            if not satisfied:
+                return clause_index
+            clause_index += 1
+            satisfied = False
+        elif not satisfied and values[abs(lit)] == (lit > 0):
+            satisfied = True
+    return -1
@@ -0,0 +1,256 @@
+import multiprocessing
+import os
+import queue
+import time
+from array import array
+
+from solver.dimacs import DimacsReader
+from solver.solver import SAT, SolveResult, Statistics, check_model, write_model_file
+
+# Settings of the portfolio workers, used in turn. Every worker but the
+# first one is also seeded, which randomizes its initial phases and
+# breaks the ties of its initial activities differently
+PORTFOLIO_CONFIGS = [
+    {"decider": "VSIDS", "restart_policy": "LUBY", "rephase": False},
+    {"decider": "VSIDS", "restart_policy": "GLUCOSE", "rephase": True},
+    {"decider": "VSIDS", "restart_policy": "LUBY", "rephase": True},
+    {"decider": "VSIDS", "restart_policy": "GLUCOSE", "rephase": False},
+    {"decider": "ORDERED", "restart_policy": "LUBY", "rephase": False},
+    {"decider": "VSIDS", "restart_policy": "NONE", "rephase": True},
+]
+
+
+def portfolio_configs(num_workers, seed=0):
+    """
+    Diversified solver settings for num_workers workers.
+
+    Parameters:
+        num_workers: number of configurations
+        seed: seed of the second worker, the next ones use seed + 1, ...
+
+    Return:
+        list of dictionaries of SAT keyword arguments
+    """
+    configs = []
+    for i in range(num_workers):
+        config = dict(PORTFOLIO_CONFIGS[i % len(PORTFOLIO_CONFIGS)])
+        config["seed"] = None if i == 0 else seed + i - 1
+        configs.append(config)
+    return configs
+
+
+class ClauseExchange:
+    """
+    Ring buffer of learned clauses in shared memory, written and read by
+    all the workers under a lock. Every record is the clause size, the
+    index of the worker which learned it and the DIMACS literals. A
+    reader lagging behind by more than the capacity skips to the end,
+    losing the overwritten clauses.
+    """
+
+    def __init__(self, capacity=1 << 20, context=multiprocessing):
+        """
+        Constructor of the exchange, must be called before the workers
+        are started.
+
+        Parameters:
+            capacity: number of integers held by the buffer
+            context: multiprocessing context the workers are created with
+
+        Return:
+            the initialized exchange object
+        """
+        self._capacity = capacity
+        self._buffer = context.RawArray("i", capacity)
+        # Number of integers written since the start
+        self._written = context.RawValue("q", 0)
+        self._lock = context.Lock()
+
+    def publish(self, worker, clauses):
+        """
+        Append the clauses learned by worker to the buffer.
+        """
+        buffer = self._buffer
+        capacity = self._capacity
+        with self._lock:
+            position = self._written.value
+            for clause in clauses:
+                if len(clause) + 2 > capacity:
+                    continue
+                buffer[position % capacity] = len(clause)
+                buffer[(position + 1) % capacity] = worker
+                position += 2
+                for lit in clause:
+                    buffer[position % capacity] = lit
+                    position += 1
+            self._written.value = position
+
+    def receive(self, worker, position):
+        """
+        Read the clauses published by the other workers since position.
+
+        Parameters:
+            worker: index of the reading worker, whose clauses are skipped
+            position: value returned by the previous call, 0 at first
+
+        Return:
+            the list of clauses and the position to read from next time
+        """
+        buffer = self._buffer
+        capacity = self._capacity
+        clauses = []
+        with self._lock:
+            written = self._written.value
+            if written - position > capacity:
+                position = written
+            while position < written:
+                size = buffer[position % capacity]
+                if buffer[(position + 1) % capacity] != worker:
+                    start = position + 2
+                    clauses.append([buffer[k % capacity] for k in range(start, start + size)])
+                position += size + 2
+        return clauses, position
+
+
+def _portfolio_worker(index, config, cnf_filename, clauses, exchange, results, limits, progress):
+    sat = SAT(False, **config)
+    if limits:
+        sat.set_limits(**limits)
+    if progress is not None:
+        sat.set_progress(progress, lambda stats: print(
+            "worker {}: {}".format(index, stats.progress_line()), flush=True))
+    if exchange is not None:
+        # Learned clauses are published in batches, at every restart
+        outbox = []
+        position = 0
+
+        def receive():
+            nonlocal position
+            exchange.publish(index, outbox)
+            del outbox[:]
+            received, position = exchange.receive(index, position)
+            return received
+
+        sat.share_clauses(outbox.append, receive)
+    if clauses is not None:
+        for clause in clauses:
+            if not sat.add_clause(clause):
+                break
+    status = sat.solve(cnf_filename)
+    results.put((index, status, sat.get_model(), sat.stats))
+
+
+def _formula_literals(cnf_filename, clauses):
+    # Flat DIMACS literals of the formula, every clause terminated by 0
+    literals = array("i")
+    if cnf_filename is not None:
+        with DimacsReader(cnf_filename) as reader:
+            reader.read_header()
+            for clause in reader.clauses():
+                literals.extend(clause)
+                literals.append(0)
+    for clause in clauses or ():
+        literals.extend(clause)
+        literals.append(0)
+    return literals
+
+
+def solve_portfolio(cnf_filename=None, clauses=None, num_workers=None, seed=0,
+                    share=True, output_dir=None, verbose=False, limits=None, verify=False,
+                    model_format="dimacs", preprocess=False, chrono=None, reuse_trail=False,
+                    progress=None):
+    """
+    Solve a formula with several diversified solvers in parallel processes,
+    exchanging their short and low-LBD learned clauses. The result of the
+    first worker to answer SAT or UNSAT is returned and the others are
+    terminated.
+
+    Parameters:
+        cnf_filename: path of the DIMACS file, read by every worker
+        clauses: clauses (lists of DIMACS literals) solved with, or
+                 instead of, the file
+        num_workers: number of processes, by default the number of CPUs
+        seed: base seed of the worker settings, see portfolio_configs
+        share: whether the workers exchange learned clauses
+        output_dir, verbose: as in solve_file
+        limits: dictionary of the arguments of SAT.set_limits, applied to
+                every worker (the memory one to each process); the result
+                is UNKNOWN when all the workers stopped at a limit, or
+                when the time limit is over
+        verify: whether to check the model against the clauses before
+                returning SAT, see check_model
+        model_format: format of the model file, see write_model
+        preprocess: whether every worker preprocesses the formula
+        chrono, reuse_trail: the options of SAT, given to every worker
+        progress: if given, every worker prints a progress line every
+                  progress seconds
+
+    Return:
+        a SolveResult
+    """
+    start_time = time.time()
+    deadline = None
+    if limits and limits.get("time") is not None:
+        deadline = start_time + limits["time"]
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if clauses is not None:
+        clauses = [list(clause) for clause in clauses]
+    configs = portfolio_configs(num_workers, seed)
+    # The preprocessing does not depend on the settings, so the workers
+    # get the same formula and the clauses they share hold in all of them
+    for config in configs:
+        config.update(preprocess=preprocess, chrono=chrono, reuse_trail=reuse_trail)
+    context = multiprocessing.get_context()
+    exchange = ClauseExchange(context=context) if share and num_workers > 1 else None
+    results = context.Queue()
+    workers = [context.Process(target=_portfolio_worker,
+                               args=(i, configs[i], cnf_filename, clauses, exchange, results,
+                                     limits, progress),
+                               daemon=True)
+               for i in range(num_workers)]
+    for worker in workers:
+        worker.start()
+    num_unknown = 0
+    try:
+        while True:
+            try:
+                index, status, model, stats = results.get(timeout=0.1)
+            except queue.Empty:
+                if deadline is not None and time.time() >= deadline:
+                    # No worker answered in time
+                    index = None
+                    status = "UNKNOWN"
+                    model = None
+                    stats = Statistics()
+                    stats._input_file = cnf_filename or ""
+                    stats._start_time = stats._read_time = start_time
+                    stats._complete_time = time.time()
+                    stats._result = status
+                    stats._stop_reason = "time"
+                    break
+                if not any(worker.is_alive() for worker in workers) and results.empty():
+                    raise RuntimeError("All the portfolio workers stopped without a result")
+                continue
+            # A worker stopped by a limit, the others may still answer
+            num_unknown += status == "UNKNOWN"
+            if status != "UNKNOWN" or num_unknown == num_workers:
+                break
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join()
+
+    if verify and status == "SAT":
+        check_model(_formula_literals(cnf_filename, clauses), model, stats)
+    if output_dir is not None and status == "SAT" and cnf_filename is not None:
+        stats._output_assignment_file = write_model_file(cnf_filename, model, output_dir,
+                                                         model_format)
+    if verbose:
+        print(status)
+        if index is not None:
+            print("Solved by worker {}: {}".format(index, configs[index]))
+        stats.print_stats()
+    return SolveResult(status, model, stats)
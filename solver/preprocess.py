@@ -0,0 +1,466 @@
+from collections import defaultdict
+
+
+def _proof_literals(clause):
+    # Internal (and binary DRAT) encoding of DIMACS literals
+    return [lit << 1 if lit > 0 else (-lit << 1) | 1 for lit in clause]
+
+
+def _signature(clause):
+    signature = 0
+    for lit in clause:
+        signature |= 1 << (abs(lit) & 63)
+    return signature
+
+
+class Preprocessor:
+    """
+    Simplifies a CNF formula before search: unit propagation, pure literal
+    elimination, equivalent literal substitution, backward subsumption with
+    self-subsuming strengthening, and bounded variable elimination, all
+    driven by occurrence lists.
+    Clauses are sets of DIMACS literals. Every clause removed together
+    with a variable is kept on a stack with the literal of that variable,
+    so that a model of the simplified formula can be extended to a model
+    of the original one.
+    """
+
+    def __init__(self, clauses, frozen=(), proof=None, max_occurrences=10,
+                 max_resolvent_size=20, max_subsumption_candidates=1000):
+        """
+        Constructor of the preprocessor, drops tautologies, repeated
+        literals and duplicate clauses.
+
+        Parameters:
+            clauses: iterable of clauses, each an iterable of DIMACS literals
+            frozen: variables which must not be eliminated, such as the
+                    variables of assumptions
+            proof: optional DratWriter logging the added and deleted clauses
+            max_occurrences: variables occurring more often than this in
+                             both polarities are not eliminated
+            max_resolvent_size: variables with a longer resolvent are not
+                                eliminated
+            max_subsumption_candidates: clauses whose rarest literal occurs
+                                        more often are not used to subsume
+
+        Return:
+            the initialized preprocessor object
+        """
+        self.num_vars = 0
+        self._frozen = {abs(var) for var in frozen}
+        self._proof = proof
+        self._max_occurrences = max_occurrences
+        self._max_resolvent_size = max_resolvent_size
+        self._max_subsumption_candidates = max_subsumption_candidates
+        # Clause store (None for removed clauses), signatures of the
+        # variables of the clauses, and the clause ids by literal
+        self._clauses = []
+        self._signatures = []
+        self._occurs = defaultdict(set)
+        # Clauses to try subsuming others with
+        self._queue = []
+        # Values of the variables fixed by units, and the units to propagate
+        self._values = {}
+        self._pending = []
+        # Pairs (witness literal, clause) for model reconstruction
+        self._stack = []
+        self.eliminated = set()
+        self.num_substituted = 0
+        self.ok = True
+
+        seen = set()
+        for clause in clauses:
+            clause = set(clause)
+            # The variables of the dropped clauses count as well, the
+            # solver leaves them free
+            if clause:
+                self.num_vars = max(self.num_vars, max(map(abs, clause)))
+            key = frozenset(clause)
+            if key in seen or any(-lit in clause for lit in clause):
+                if self._proof is not None:
+                    self._proof.delete(_proof_literals(clause))
+                continue
+            seen.add(key)
+            self._add(clause)
+
+    def _add(self, clause):
+        if len(clause) == 0:
+            self.ok = False
+        elif len(clause) == 1:
+            self._assign(next(iter(clause)))
+        else:
+            clause_id = len(self._clauses)
+            self._clauses.append(clause)
+            self._signatures.append(_signature(clause))
+            for lit in clause:
+                self._occurs[lit].add(clause_id)
+            self._queue.append(clause_id)
+
+    def _remove(self, clause_id, witness=None):
+        clause = self._clauses[clause_id]
+        for lit in clause:
+            self._occurs[lit].discard(clause_id)
+        self._clauses[clause_id] = None
+        if witness is not None:
+            self._stack.append((witness, clause))
+        if self._proof is not None:
+            self._proof.delete(_proof_literals(clause))
+
+    def _strengthen(self, clause_id, lit):
+        # Remove the false or self-subsumed literal lit from the clause
+        clause = self._clauses[clause_id]
+        if self._proof is not None:
+            self._proof.add(_proof_literals(clause - {lit}))
+            self._proof.delete(_proof_literals(clause))
+        clause.discard(lit)
+        self._occurs[lit].discard(clause_id)
+        if len(clause) == 1:
+            unit = next(iter(clause))
+            self._occurs[unit].discard(clause_id)
+            self._clauses[clause_id] = None
+            self._assign(unit)
+        else:
+            self._signatures[clause_id] = _signature(clause)
+            self._queue.append(clause_id)
+
+    def _assign(self, lit):
+        var = abs(lit)
+        if var in self._values:
+            if self._values[var] != (lit > 0):
+                self.ok = False
+                if self._proof is not None:
+                    self._proof.add([])
+            return
+        if self._proof is not None:
+            self._proof.add(_proof_literals([lit]))
+        self._values[var] = lit > 0
+        self._pending.append(lit)
+
+    def _propagate(self):
+        occurs = self._occurs
+        while self._pending and self.ok:
+            lit = self._pending.pop()
+            for clause_id in list(occurs[lit]):
+                self._remove(clause_id)
+            for clause_id in list(occurs[-lit]):
+                self._strengthen(clause_id, -lit)
+
+    def _eliminate_pure_literals(self):
+        occurs = self._occurs
+        changed = True
+        while changed:
+            changed = False
+            for var in range(1, self.num_vars + 1):
+                if var in self._values or var in self.eliminated or var in self._frozen:
+                    continue
+                if occurs[var] and not occurs[-var]:
+                    pure = var
+                elif occurs[-var] and not occurs[var]:
+                    pure = -var
+                else:
+                    continue
+                for clause_id in list(occurs[pure]):
+                    self._remove(clause_id, pure)
+                self.eliminated.add(var)
+                changed = True
+
+    def _binary_implication_graph(self):
+        """
+        Return:
+            dictionary of literal to the literals it implies through the
+            binary clauses: a clause (a b) gives the edges -a -> b and
+            -b -> a
+        """
+        graph = defaultdict(list)
+        for clause in self._clauses:
+            if clause is not None and len(clause) == 2:
+                a, b = clause
+                graph[-a].append(b)
+                graph[-b].append(a)
+        return graph
+
+    def _equivalent_literals(self, graph):
+        """
+        Strongly connected components of the binary implication graph
+        with more than one literal (iterative Tarjan's algorithm). All the
+        literals of a component are equivalent.
+        """
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+        components = []
+        counter = 0
+        for root in list(graph):
+            if root in index:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(graph[root]))]
+            while work:
+                node, successors = work[-1]
+                advanced = False
+                for succ in successors:
+                    if succ not in index:
+                        index[succ] = low[succ] = counter
+                        counter += 1
+                        stack.append(succ)
+                        on_stack.add(succ)
+                        work.append((succ, iter(graph.get(succ, ()))))
+                        advanced = True
+                        break
+                    if succ in on_stack:
+                        low[node] = min(low[node], index[succ])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        lit = stack.pop()
+                        on_stack.discard(lit)
+                        component.append(lit)
+                        if lit == node:
+                            break
+                    if len(component) > 1:
+                        components.append(component)
+        return components
+
+    def _substitute_equivalences(self):
+        """
+        Replace every literal of an equivalence class by a representative
+        literal of the class, a frozen one if any, else the one of the
+        smallest variable. The replaced variables are eliminated, with the
+        two binary clauses of their equivalence kept for reconstruction.
+        """
+        occurs = self._occurs
+        # Replaced variable to the literal its positive literal becomes
+        replacement = {}
+        for component in self._equivalent_literals(self._binary_implication_graph()):
+            if abs(component[0]) in replacement:
+                # The component of the negated literals was done already
+                continue
+            literals = set(component)
+            contradiction = next((lit for lit in component if -lit in literals), None)
+            if contradiction is not None:
+                # lit implies -lit and -lit implies lit
+                self._assign(-contradiction)
+                self._assign(contradiction)
+                return
+            frozen = [lit for lit in component if abs(lit) in self._frozen]
+            representative = frozen[0] if frozen else min(component, key=abs)
+            for lit in component:
+                if lit != representative and abs(lit) not in self._frozen:
+                    replacement[abs(lit)] = representative if lit > 0 else -representative
+        if not replacement:
+            return
+
+        def substitute(lit):
+            var = abs(lit)
+            if var in replacement:
+                return replacement[var] if lit > 0 else -replacement[var]
+            return lit
+
+        clause_ids = set()
+        for var in replacement:
+            clause_ids |= occurs[var] | occurs[-var]
+        new_clauses = []
+        for clause_id in clause_ids:
+            new_clause = {substitute(lit) for lit in self._clauses[clause_id]}
+            if not any(-lit in new_clause for lit in new_clause):
+                new_clauses.append(new_clause)
+                if self._proof is not None:
+                    self._proof.add(_proof_literals(new_clause))
+        for clause_id in clause_ids:
+            self._remove(clause_id)
+        for var, lit in replacement.items():
+            self._stack.append((var, {var, -lit}))
+            self._stack.append((-var, {-var, lit}))
+            self.eliminated.add(var)
+        self.num_substituted += len(replacement)
+        for clause in new_clauses:
+            self._add(clause)
+        self._propagate()
+
+    def _subsume(self):
+        """
+        Backward subsumption: every queued clause removes the clauses it
+        subsumes and strengthens the clauses it subsumes but for one
+        negated literal.
+        """
+        clauses = self._clauses
+        signatures = self._signatures
+        occurs = self._occurs
+        queue = sorted(set(self._queue), key=lambda c: -len(clauses[c]) if clauses[c] else 0)
+        self._queue = []
+        while (queue or self._queue) and self.ok:
+            if not queue:
+                queue = sorted(set(self._queue), key=lambda c: -len(clauses[c]) if clauses[c] else 0)
+                self._queue = []
+            clause_id = queue.pop()
+            clause = clauses[clause_id]
+            if clause is None:
+                continue
+            best = min(clause, key=lambda lit: len(occurs[lit]) + len(occurs[-lit]))
+            if len(occurs[best]) + len(occurs[-best]) > self._max_subsumption_candidates:
+                continue
+            signature = signatures[clause_id]
+            for other_id in list(occurs[best]) + list(occurs[-best]):
+                if clauses[clause_id] is None:
+                    break
+                other = clauses[other_id]
+                if (other_id == clause_id or other is None or len(other) < len(clause)
+                        or signature & ~signatures[other_id]):
+                    continue
+                negated = 0
+                for lit in clause:
+                    if lit in other:
+                        continue
+                    if negated == 0 and -lit in other:
+                        negated = lit
+                        continue
+                    negated = None
+                    break
+                if negated is None:
+                    continue
+                if negated == 0:
+                    self._remove(other_id)
+                else:
+                    self._strengthen(other_id, -negated)
+                    self._propagate()
+                    if not self.ok:
+                        return
+
+    def _resolvents(self, var):
+        """
+        Non-tautological resolvents of the clauses of var and -var, or None
+        if there are more of them than the clauses they replace or one is
+        too long.
+        """
+        clauses = self._clauses
+        positive = [clauses[c] for c in self._occurs[var]]
+        negative = [clauses[c] for c in self._occurs[-var]]
+        limit = len(positive) + len(negative)
+        resolvents = []
+        for pos_clause in positive:
+            for neg_clause in negative:
+                resolvent = (pos_clause | neg_clause) - {var, -var}
+                if any(-lit in resolvent for lit in resolvent):
+                    continue
+                if len(resolvent) > self._max_resolvent_size or len(resolvents) == limit:
+                    return None
+                resolvents.append(resolvent)
+        return resolvents
+
+    def _eliminate_variables(self):
+        """
+        Bounded variable elimination: a variable is replaced by all the
+        resolvents of its clauses when they are not more numerous.
+        """
+        occurs = self._occurs
+        candidates = [var for var in range(1, self.num_vars + 1)
+                      if var not in self._values and var not in self.eliminated
+                      and var not in self._frozen and (occurs[var] or occurs[-var])]
+        candidates.sort(key=lambda var: len(occurs[var]) * len(occurs[-var]))
+        for var in candidates:
+            if not self.ok:
+                return
+            if var in self._values or var in self.eliminated:
+                continue
+            positive = len(occurs[var])
+            negative = len(occurs[-var])
+            if positive > self._max_occurrences and negative > self._max_occurrences:
+                continue
+            resolvents = self._resolvents(var)
+            if resolvents is None:
+                continue
+            # The resolvents are added first, as the proof needs the
+            # clauses they are derived from
+            for resolvent in resolvents:
+                if self._proof is not None:
+                    self._proof.add(_proof_literals(resolvent))
+            for lit in (var, -var):
+                for clause_id in list(occurs[lit]):
+                    self._remove(clause_id, lit)
+            self.eliminated.add(var)
+            for resolvent in resolvents:
+                self._add_resolvent(resolvent)
+            self._propagate()
+
+    def _add_resolvent(self, clause):
+        # Drop the literals fixed since the resolvent was computed
+        values = self._values
+        reduced = set()
+        for lit in clause:
+            value = values.get(abs(lit))
+            if value is None:
+                reduced.add(lit)
+            elif value == (lit > 0):
+                return
+        if len(reduced) < len(clause) and self._proof is not None:
+            self._proof.add(_proof_literals(reduced))
+        self._add(reduced)
+
+    def run(self):
+        """
+        Simplify the formula.
+
+        Return:
+            False if the formula was found unsatisfiable
+        """
+        self._propagate()
+        if self.ok:
+            self._eliminate_pure_literals()
+            self._substitute_equivalences()
+        if self.ok:
+            self._subsume()
+        if self.ok:
+            self._eliminate_variables()
+            self._subsume()
+        if self.ok:
+            self._eliminate_pure_literals()
+        return self.ok
+
+    def units(self):
+        """
+        Return:
+            the DIMACS literals fixed by preprocessing
+        """
+        return [var if value else -var for var, value in self._values.items()]
+
+    def num_clauses(self):
+        """
+        Return:
+            the number of clauses left, not counting the units
+        """
+        return sum(clause is not None for clause in self._clauses)
+
+    def clauses(self):
+        """
+        Generator over the simplified clauses, as lists of DIMACS literals.
+        """
+        for clause in self._clauses:
+            if clause is not None:
+                yield sorted(clause, key=abs)
+
+    def extend_model(self, model):
+        """
+        Extend a model of the simplified formula to the original one.
+
+        Parameters:
+            model: dictionary of variable to boolean value, updated in place
+
+        Return:
+            the model
+        """
+        for var, value in self._values.items():
+            model[var] = value
+        for witness, clause in reversed(self._stack):
+            if not any(model.get(abs(lit), False) == (lit > 0) for lit in clause):
+                model[abs(witness)] = witness > 0
+        return model
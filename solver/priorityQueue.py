@@ -1,267 +1,223 @@
+from array import array
+
+
 class PriorityQueue:
     """
-    Class to implement the Priority Queue.
+    Class to implement the Priority Queue of variables ordered by
+    their VSIDS activity. The heap, the positions of the variables
+    in the heap and the activities are flat arrays indexed by variable.
     """
 
-    def __init__(self, start_list):
+    def __init__(self, start_list, decay=0.95):
         """
         Constructor of the priority queue class.
 
         Parameters:
-            start_list: the initially array of scores which are to be pushed in
-                        the priority queue
+            start_list: the initial activity of every variable, indexed by
+                        variable (index 0 is not related to any variable)
+            decay: factor by which all the activities are (virtually)
+                   multiplied at every call of decay()
 
         Return:
             the initialized priority queue object
         """
 
-        # The first element is removed as it is not related
-        # to any variable or literal
-        self.size = len(start_list) - 1
-        temp = start_list[1:]
-
-        # Array that stores the heap
-        # Each element in the heap is of the form
-        # [priority,element] where priority is the
-        # priority of the element and the heap is
-        # max heap with respect to the priority scores
-        self.heap = []
-
-        # Array that maps elements to their indices
-        # in the heap
-        self.indices = []
-
-        ctr = 1
-        for x in temp:
-            # For all elements in the array,
-            # push the [priority,ctr] pair in
-            # the heap
-            self.heap.append([x, ctr])
-            self.indices.append(ctr - 1)
-            ctr += 1
+        # Activity of every variable, and the amount added to it
+        # when the variable is bumped
+        self.activity = array("d", start_list)
+        self.increment = 1.0
+        self.decay_factor = decay
+
+        # Number of operations done on the queue
+        self.num_pops = 0
+        self.num_inserts = 0
+        self.num_bumps = 0
+
+        # Array that stores the heap: a max heap of variables
+        # with respect to their activity
+        self.heap = array("i", range(1, len(start_list)))
+        self.size = len(self.heap)
+
+        # Array that maps variables to their indices in the heap,
+        # -1 for the variables not in the heap
+        self.indices = array("i", range(-1, len(start_list) - 1))
 
         # This is the basic method to convert an array into
-        # heap (by calling heapify in reverse order from first
-        # half elements)
-        for i in range(int(self.size / 2) - 1, -1, -1):
-            self.heapify(i)
+        # heap (by sifting down the first half elements in
+        # reverse order)
+        for i in range(self.size // 2 - 1, -1, -1):
+            self.sift_down(i)
 
-    def swap(self, ind1, ind2):
+    def __contains__(self, var):
+        return self.indices[var] != -1
+
+    def sift_up(self, pos):
         """
-        Swaps elements poined by ind1 and ind2 in the heap.
+        Move the element at position pos up until its parent has a higher
+        or equal activity.
 
         Parameters:
-            ind1: index in the heap of first element to be swapped
-            ind2: index in the heap of the second element to be swapped
+            pos: position in the heap of the element to be moved
 
         Return:
             None
         """
+        heap = self.heap
+        indices = self.indices
+        activity = self.activity
+        var = heap[pos]
+        act = activity[var]
+        while pos > 0:
+            par = (pos - 1) >> 1
+            par_var = heap[par]
+            if act <= activity[par_var]:
+                break
+            # Move the parent down into the hole
+            heap[pos] = par_var
+            indices[par_var] = pos
+            pos = par
+        heap[pos] = var
+        indices[var] = pos
 
-        # Swap the nodes in the heap array
-        temp = self.heap[ind1]
-        self.heap[ind1] = self.heap[ind2]
-        self.heap[ind2] = temp
-
-        # Swap the indices of the nodes
-        # in the indices array as the nodes
-        # swapped and so their indices also must
-        # be swapped
-        p1 = self.heap[ind1][1]
-        p1 -= 1
-        p2 = self.heap[ind2][1]
-        p2 -= 1
-        temp = self.indices[p1]
-        self.indices[p1] = self.indices[p2]
-        self.indices[p2] = temp
-
-    def heapify(self, node_index):
+    def sift_down(self, pos):
         """
-        The well known heapify method. Takes in a
-        node_index and assuming that its children subtress
-        are perfect max heaps, this method converts the whole
-        tree rooted at node_index into a max heap.
+        Move the element at position pos down until both its children
+        have a lower or equal activity.
 
         Parameters:
-            node_index: root of the tree which has to be heapified
+            pos: position in the heap of the element to be moved
 
         Return:
             None
         """
-
-        # Calculate the max priority between the node,
-        # its left and its right child
-
-        maxp = self.heap[node_index][0]
-
-        left_index = 2 * node_index + 1
-        if left_index < self.size:
-            pr = self.heap[left_index][0]
-            if pr > maxp:
-                maxp = pr
-
-        right_index = 2 * node_index + 2
-        if right_index < self.size:
-            pr = self.heap[right_index][0]
-            if pr > maxp:
-                maxp = pr
-
-        if maxp != self.heap[node_index][0]:
-            # If max priority is not of root
-
-            if left_index < self.size and maxp == self.heap[left_index][0]:
-                # If max priority is of the left node,
-                # swap left node with root node
-                # and recursively call heapify on the left node
-                # to make it a nax heap
-                self.swap(left_index, node_index)
-                self.heapify(left_index)
-            else:
-                # If max priority is of the right node,
-                # swap right node with root node
-                # and recursively call heapify on the right node
-                # to make it a nax heap
-                self.swap(right_index, node_index)
-                self.heapify(right_index)
+        heap = self.heap
+        indices = self.indices
+        activity = self.activity
+        size = self.size
+        var = heap[pos]
+        act = activity[var]
+        while True:
+            child = 2 * pos + 1
+            if child >= size:
+                break
+            child_var = heap[child]
+            right = child + 1
+            if right < size and activity[heap[right]] > activity[child_var]:
+                child = right
+                child_var = heap[right]
+            if activity[child_var] <= act:
+                break
+            # Move the larger child up into the hole
+            heap[pos] = child_var
+            indices[child_var] = pos
+            pos = child
+        heap[pos] = var
+        indices[var] = pos
 
     def get_top(self):
         """
-        Get the top element (with max priority) from the queue.
+        Get the top element (with max activity) from the queue and remove it.
 
         Parameters:
             None
 
         Return:
-            -1 if queue is empty else the element with the highest priority
+            -1 if queue is empty else the variable with the highest activity
         """
 
         # If queue is empty, return -1
         if self.size == 0:
             return -1
+        self.num_pops += 1
 
-        # Top element is the element in heap[0]
-        top_element = self.heap[0][1]
-
-        # To remove the first element, we swap it with the last
-        # element, reduce size of queue by 1 and call
-        # heapify(0) to maintain the heap structure
-        self.swap(0, self.size - 1)
-        self.indices[self.heap[self.size - 1][1] - 1] = -1
+        # To remove the first element, the last element is moved
+        # to the root and sifted down to maintain the heap structure
+        heap = self.heap
+        top_element = heap[0]
+        self.indices[top_element] = -1
         self.size -= 1
-        self.heapify(0)
-
+        if self.size > 0:
+            heap[0] = heap[self.size]
+            self.sift_down(0)
         return top_element
 
-    def print_data(self):
+    def add(self, var):
         """
-        Method to print the data structures of the class.
+        Add the variable var to the queue if it is not in it already.
 
         Parameters:
-            None
+            var: the variable to be added in the priority queue
 
         Return:
             None
         """
-        print("Size: ", self.size)
-        print("Heap: ", self.heap[:self.size])
-        print("Indices: ", self.indices)
+        if self.indices[var] != -1:
+            return
+        self.num_inserts += 1
+        self.heap[self.size] = var
+        self.indices[var] = self.size
+        self.size += 1
+        self.sift_up(self.size - 1)
 
-    def increase_update(self, key, value):
+    def extend(self, num_vars):
         """
-        Method takes in a key and value and for the element that matches the key,
-        its priority is increased by value.
+        Add the variables up to num_vars to the queue, with activity 0.
 
         Parameters:
-            key: element whose priority is to be increased
-            value: amount by which the priority has to be increased
+            num_vars: the new number of variables
 
         Return:
             None
         """
-        if self.indices[key - 1] == -1:
+        grow = num_vars + 1 - len(self.activity)
+        if grow <= 0:
             return
+        first = len(self.activity)
+        self.activity.extend(array("d", [0.0]) * grow)
+        self.heap.extend(array("i", [0]) * grow)
+        self.indices.extend(array("i", [-1]) * grow)
+        for var in range(first, num_vars + 1):
+            self.add(var)
 
-        pos = self.indices[key - 1]
-
-        # Increase its priority by value
-        self.heap[pos][0] += value
-
-        # To maintain the heap structure, traverse the heap
-        # from this node upwards and replace it with its parent
-        # till its parent is bigger than it.
-        # (This is needed as increasing the priority
-        # can disrupt the heap structure)
-        par = pos
-        while par != 0:
-            temp = par
-            par = int((par - 1) / 2)
-            if self.heap[temp][0] > self.heap[par][0]:
-                self.swap(temp, par)
-            else:
-                break
-
-    def remove(self, key):
+    def bump(self, var):
         """
-        Remove the element pointed by key from the queue.
+        Increase the activity of var by the current increment, rescaling
+        all the activities when they get too large.
 
         Parameters:
-            key: the element to be removed from the queue
+            var: the variable whose activity is increased
 
         Return:
             None
         """
-        if self.indices[key - 1] == -1:
-            return
+        self.num_bumps += 1
+        activity = self.activity
+        activity[var] += self.increment
+        if activity[var] > 1e100:
+            for i in range(len(activity)):
+                activity[i] *= 1e-100
+            self.increment *= 1e-100
+        pos = self.indices[var]
+        if pos != -1:
+            self.sift_up(pos)
 
-        # Replace the node to be deleted with
-        # the final node
-        pos = self.indices[key - 1]
-        this_node_pr = self.heap[pos][0]
-        final_node_pr = self.heap[self.size - 1][0]
-        self.swap(pos, self.size - 1)
-        self.size -= 1
-        self.indices[key - 1] = -1
-
-        if final_node_pr > this_node_pr:
-            # If the replaced node has a higher priority,
-            # then the deleted node, traverse the heap upwards
-            # and replace the node with its parent unti
-            # its parent is bigger than it. This is done to
-            # maintain the heap structure.
-            par = pos
-            while par != 0:
-                temp = par
-                par = int((par - 1) / 2)
-                if self.heap[temp][0] > self.heap[par][0]:
-                    self.swap(temp, par)
-                else:
-                    break
-        elif this_node_pr > final_node_pr:
-            # If replaced node has a lower priority than the
-            # removed node,then use heapify to maintain the
-            # heap structure
-            self.heapify(pos)
-
-    def add(self, key, value):
+    def decay(self):
+        """
+        Decay all the activities, by increasing the increment of
+        future bumps instead (exponential VSIDS).
+        """
+        self.increment /= self.decay_factor
+
+    def print_data(self):
         """
-        Method to add an element (key) with priority value
-        into the priority queue.
+        Method to print the data structures of the class.
 
         Parameters:
-            key: the element to be added in the priority queue
-            value: the priority value of the element to be added
+            None
 
         Return:
             None
         """
-
-        # Push the key to the last position with priority 0
-        self.heap[self.size] = [0, key]
-        self.indices[key - 1] = self.size
-
-        # Increase the heap size
-        self.size += 1
-
-        # Call the increase update method to increase
-        # the priority of key from 0 to value
-        self.increase_update(key, value)
\ No newline at end of file
+        print("Size: ", self.size)
+        print("Heap: ", self.heap[:self.size])
+        print("Indices: ", self.indices)
@@ -0,0 +1,123 @@
+from collections import deque
+
+RESTART_POLICIES = ["NONE", "LUBY", "GLUCOSE"]
+
+
+def luby(i):
+    """
+    Element i (starting from 1) of the Luby sequence 1,1,2,1,1,2,4,1,...
+    """
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while i != (1 << k) - 1:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+class NoRestart:
+    """
+    Policy that never restarts.
+    """
+
+    def on_conflict(self, lbd, trail_size):
+        pass
+
+    def should_restart(self):
+        return False
+
+    def on_restart(self):
+        pass
+
+
+class LubyRestart:
+    """
+    Restarts after unit * luby(i) conflicts for the i-th restart.
+    """
+
+    def __init__(self, unit=100):
+        self._unit = unit
+        self._num_restarts = 0
+        self._conflicts = 0
+        self._limit = unit * luby(1)
+
+    def on_conflict(self, lbd, trail_size):
+        self._conflicts += 1
+
+    def should_restart(self):
+        return self._conflicts >= self._limit
+
+    def on_restart(self):
+        self._num_restarts += 1
+        self._conflicts = 0
+        self._limit = self._unit * luby(self._num_restarts + 1)
+
+
+class GlucoseRestart:
+    """
+    Glucose dynamic restarts: restart when the average LBD of the last
+    window_size learned clauses exceeds the average LBD of all learned
+    clauses by the factor 1 / margin. Restarts are blocked when the
+    trail is much larger than usual, as the solver may be close to a
+    satisfying assignment.
+    """
+
+    def __init__(self, window_size=50, margin=0.8, blocking_window=5000,
+                 blocking_factor=1.4, blocking_min_conflicts=10000):
+        self._margin = margin
+        self._blocking_factor = blocking_factor
+        self._blocking_min_conflicts = blocking_min_conflicts
+        self._lbd_queue = deque(maxlen=window_size)
+        self._lbd_queue_sum = 0
+        self._trail_queue = deque(maxlen=blocking_window)
+        self._trail_queue_sum = 0
+        self._lbd_total = 0
+        self._conflicts = 0
+
+    def on_conflict(self, lbd, trail_size):
+        self._conflicts += 1
+        self._lbd_total += lbd
+
+        trail_queue = self._trail_queue
+        if len(trail_queue) == trail_queue.maxlen:
+            self._trail_queue_sum -= trail_queue[0]
+        trail_queue.append(trail_size)
+        self._trail_queue_sum += trail_size
+        if (self._conflicts > self._blocking_min_conflicts
+                and len(self._lbd_queue) == self._lbd_queue.maxlen
+                and len(trail_queue) == trail_queue.maxlen
+                and trail_size * len(trail_queue) > self._blocking_factor * self._trail_queue_sum):
+            self._lbd_queue.clear()
+            self._lbd_queue_sum = 0
+
+        lbd_queue = self._lbd_queue
+        if len(lbd_queue) == lbd_queue.maxlen:
+            self._lbd_queue_sum -= lbd_queue[0]
+        lbd_queue.append(lbd)
+        self._lbd_queue_sum += lbd
+
+    def should_restart(self):
+        lbd_queue = self._lbd_queue
+        return (len(lbd_queue) == lbd_queue.maxlen and
+                self._lbd_queue_sum * self._margin * self._conflicts >
+                self._lbd_total * len(lbd_queue))
+
+    def on_restart(self):
+        self._lbd_queue.clear()
+        self._lbd_queue_sum = 0
+
+
+def make_restart_policy(name):
+    """
+    Create the restart policy called name (one of RESTART_POLICIES).
+    """
+    if name == "LUBY":
+        return LubyRestart()
+    if name == "GLUCOSE":
+        return GlucoseRestart()
+    if name == "NONE":
+        return NoRestart()
+    raise ValueError('The restart policy must be one from the list ["NONE","LUBY","GLUCOSE"]')
@@ -1,10 +1,45 @@
 import os
+import random
+import resource
+import signal
 import time
-import json
-from collections import OrderedDict
-
+from array import array
+from bisect import bisect_left
+
+from solver.cache import load_cache
+from solver.dimacs import DimacsReader
+from solver.drat import DratWriter
+from solver.model import MODEL_FORMATS, verify_model, write_model
+from solver.preprocess import Preprocessor
 # needs in VSIDS decider
 from solver.priorityQueue import PriorityQueue
+from solver.restart import make_restart_policy
+
+# Phases the saved phases are reset to, in turn, when rephasing
+REPHASE_CYCLE = ["BEST", "ORIGINAL", "BEST", "INVERTED"]
+# Phases of the search whose time is measured
+SEARCH_PHASES = ["propagate", "analyze", "backtrack", "decide", "reduce"]
+# Maximum number of variables probed for failed literals after preprocessing
+PROBE_LIMIT = 10000
+# Resource limits of a call to solve, see SAT.set_limits
+LIMITS = ["conflicts", "propagations", "time", "memory"]
+# Conflicts and decisions between two checks of the time and memory limits
+LIMIT_CHECK_INTERVAL = 128
+# Last bucket of the histograms, which also counts all the larger values
+HISTOGRAM_SIZE = 32
+# Clause arena: every clause is stored in SAT._arena as HEADER_SIZE words
+# followed by its literals, and referenced by the offset of its first
+# literal; the header words are at these offsets from that reference
+HEADER_SIZE = 4
+CLAUSE_SIZE = -1
+CLAUSE_FLAGS = -2
+CLAUSE_LBD = -3
+CLAUSE_ACTIVITY = -4
+# Bits of the flags header word
+LEARNED = 1
+DELETED = 2
+# Share of the arena taken by deleted clauses beyond which it is compacted
+GARBAGE_FRACTION = 0.2
 
 
 class Statistics:
@@ -15,191 +50,869 @@ class Statistics:
 
     def __init__(self):
         self._input_file = ""
+        # "SAT", "UNSAT" or "UNKNOWN", and for UNKNOWN the reason the search
+        # stopped: one of LIMITS, or "interrupt"
         self._result = ""
+        self._stop_reason = ""
         self._output_assignment_file = ""
         self._num_vars = 0
         self._num_orig_clauses = 0
         self._num_clauses = 0
         self._num_learned_clauses = 0
+        self._num_conflicts = 0
+        self._num_restarts = 0
+        self._num_deleted_clauses = 0
+        self._num_imported_clauses = 0
+        # Words of the clause arena at the end of the search, and the
+        # number of times it was compacted
+        self._arena_size = 0
+        self._num_compactions = 0
+        # Variables eliminated and fixed by preprocessing, the number of
+        # clauses it left and the time it took
+        self._num_eliminated_vars = 0
+        self._num_fixed_vars = 0
+        self._num_preprocessed_clauses = 0
+        # Variables substituted by equivalent literals, and literals fixed
+        # by failed literal probing
+        self._num_equivalent_vars = 0
+        self._num_failed_literals = 0
+        self._num_necessary_assignments = 0
+        self._preprocess_time = 0.0
         self._num_decisions = 0
         self._num_implications = 0
+        # Time of the check of the model against the clauses, see verify
+        self._verify_time = 0.0
+        # Flips and time of the local search, see solver.localSearch
+        self._num_flips = 0
+        self._local_search_time = 0.0
+        # Chronological backtracks, and restarts and decision levels kept
+        # by trail reuse
+        self._num_chrono_backtracks = 0
+        self._num_reused_trails = 0
+        self._num_reused_levels = 0
+        # Number of trail literals whose watch lists were walked
+        self._num_propagations = 0
         self._start_time = 0
         self._read_time = 0
         self._complete_time = 0
+        # Seconds spent in every phase of SEARCH_PHASES
+        self._phase_times = dict.fromkeys(SEARCH_PHASES, 0.0)
+        # Operations on the VSIDS heap
+        self._heap_pops = 0
+        self._heap_inserts = 0
+        self._heap_bumps = 0
+        # Histograms of the size and LBD of the learned clauses, and of
+        # the number of conflicts between restarts (bucket k counts the
+        # intervals of 2^(k-1) to 2^k - 1 conflicts)
+        self._learned_size_histogram = array("i", [0]) * (HISTOGRAM_SIZE + 1)
+        self._lbd_histogram = array("i", [0]) * (HISTOGRAM_SIZE + 1)
+        self._restart_histogram = array("i", [0]) * (HISTOGRAM_SIZE + 1)
+
+    def as_dict(self):
+        """
+        Return:
+            the statistics as a dictionary of plain values, which can be
+            dumped as JSON; histograms only hold their non-empty buckets
+        """
+        def histogram(counts):
+            return {k: count for k, count in enumerate(counts) if count}
+
+        return {
+            "input_file": self._input_file,
+            "result": self._result,
+            "stop_reason": self._stop_reason,
+            "vars": self._num_vars,
+            "original_clauses": self._num_orig_clauses,
+            "stored_clauses": self._num_clauses,
+            "learned_clauses": self._num_learned_clauses,
+            "deleted_clauses": self._num_deleted_clauses,
+            "imported_clauses": self._num_imported_clauses,
+            "arena": {"words": self._arena_size, "compactions": self._num_compactions},
+            "preprocess": {"eliminated_vars": self._num_eliminated_vars,
+                           "fixed_vars": self._num_fixed_vars,
+                           "equivalent_vars": self._num_equivalent_vars,
+                           "failed_literals": self._num_failed_literals,
+                           "necessary_assignments": self._num_necessary_assignments,
+                           "clauses": self._num_preprocessed_clauses,
+                           "time": self._preprocess_time},
+            "conflicts": self._num_conflicts,
+            "restarts": self._num_restarts,
+            "chrono_backtracks": self._num_chrono_backtracks,
+            "reused_trails": self._num_reused_trails,
+            "reused_levels": self._num_reused_levels,
+            "decisions": self._num_decisions,
+            "implications": self._num_implications,
+            "propagations": self._num_propagations,
+            "read_time": self._read_time - self._start_time,
+            "solve_time": self._complete_time - self._read_time,
+            "verify_time": self._verify_time,
+            "local_search": {"flips": self._num_flips, "time": self._local_search_time},
+            "phase_times": dict(self._phase_times),
+            "heap": {"pops": self._heap_pops, "inserts": self._heap_inserts,
+                     "bumps": self._heap_bumps},
+            "learned_size_histogram": histogram(self._learned_size_histogram),
+            "lbd_histogram": histogram(self._lbd_histogram),
+            "restart_histogram": histogram(self._restart_histogram),
+        }
+
+    def progress_line(self):
+        """
+        Return:
+            a one-line summary of the search so far, for progress reports
+        """
+        elapsed = time.time() - self._read_time
+        rate = self._num_propagations / elapsed if elapsed > 0 else 0.0
+        shares = " ".join("{} {:.0%}".format(phase, seconds / elapsed if elapsed > 0 else 0.0)
+                          for phase, seconds in self._phase_times.items())
+        return ("c {:9.2f}s conflicts {} restarts {} learned {} deleted {} decisions {} "
+                "props/s {:.0f} | {}".format(elapsed, self._num_conflicts, self._num_restarts,
+                                            self._num_learned_clauses, self._num_deleted_clauses,
+                                            self._num_decisions, rate, shares))
 
     def print_stats(self):
         print("=========================== STATISTICS ===============================")
         print("Solving formula from file: ", self._input_file)
         print(f"Vars:{self._num_vars}, Clauses:{self._num_orig_clauses} Stored Clauses:{self._num_clauses}")
         print("Input Reading Time: ", self._read_time - self._start_time)
+        if self._preprocess_time:
+            print(f"Preprocessing: eliminated vars:{self._num_eliminated_vars}, fixed vars:"
+                  f"{self._num_fixed_vars}, equivalent vars:{self._num_equivalent_vars}, "
+                  f"clauses left:{self._num_preprocessed_clauses}, time:{self._preprocess_time}")
+            print(f"Probing: failed literals:{self._num_failed_literals}, necessary assignments:"
+                  f"{self._num_necessary_assignments}")
+        if self._num_flips:
+            print(f"Local search: flips:{self._num_flips}, time:{self._local_search_time}")
         print("-------------------------------")
         print("Learned clauses: ", self._num_learned_clauses)
+        print("Conflicts: ", self._num_conflicts)
+        print("Restarts: ", self._num_restarts)
+        if self._num_chrono_backtracks or self._num_reused_trails:
+            print(f"Chronological backtracks:{self._num_chrono_backtracks}, reused trails:"
+                  f"{self._num_reused_trails}, reused levels:{self._num_reused_levels}")
+        print("Deleted clauses: ", self._num_deleted_clauses)
+        print(f"Clause arena: words:{self._arena_size}, compactions:{self._num_compactions}")
+        if self._num_imported_clauses:
+            print("Imported clauses: ", self._num_imported_clauses)
         print("Decisions made: ", self._num_decisions)
         print("Implications made: ", self._num_implications)
+        print("Propagations: ", self._num_propagations)
+        print("Phase times: ", ", ".join("{} {:.3f}s".format(phase, seconds)
+                                         for phase, seconds in self._phase_times.items()))
+        if self._heap_pops:
+            print("Heap pops/inserts/bumps: ", self._heap_pops, self._heap_inserts, self._heap_bumps)
+        if self._verify_time:
+            print("Model verification time: ", self._verify_time)
         print("All time: ", self._complete_time - self._start_time)
         print("RESULT: ", self._result)
+        if self._result == "UNKNOWN":
+            print("Stopped by: ", self._stop_reason)
         if self._result == "SAT":
             print("Satisfying Assignment stored in file: ", self._output_assignment_file)
         print("=" * 70)
 
 
-class AssignedNode:
-    def __init__(self, var, value, level, clause):
-        self.var = var
-        self.value = value
-        self.level = level
-        self.clause = clause
-        self.index = -1
+def to_literal(dimacs_literal):
+    """
+    Internal encoding of a DIMACS literal: 2 * var for var and
+    2 * var + 1 for -var, so the negation of lit is lit ^ 1.
+    """
+    if dimacs_literal > 0:
+        return dimacs_literal << 1
+    return (-dimacs_literal << 1) | 1
 
-    def __str__(self):
-        return "Var: {} Val: {} Lev: {} Cls: {} Ind: {} ".format(
-                self.var, self.value,self.level, self.clause, self.index)
+
+def to_dimacs(literal):
+    if literal & 1:
+        return -(literal >> 1)
+    return literal >> 1
 
 
 class SAT:
-    def __init__(self, to_log, decider):
+    def __init__(self, to_log, decider, restart_policy="LUBY", rephase=False, seed=None,
+                 preprocess=False, verify=False, chrono=None, reuse_trail=False):
         self._num_clauses = 0
         self._num_vars = 0
         self._level = 0
-        self._nodes_variable = {}
-        self._clauses = []
-        self._stack_of_decision = []
-        self._clauses_watched_by_l = {}
-        self._literals_watching_c = {}
+        # False once the clauses are known to be unsatisfiable
+        self._ok = True
+        # Flat clause arena, see HEADER_SIZE: the header of a clause holds
+        # its size, flags, LBD and activity (number of uses in conflict
+        # analysis, halved at every reduction). Deleted clauses stay until
+        # the arena is compacted, wasted counts their words
+        self._arena = array("i")
+        self._wasted = 0
+        # References of the learned clauses
+        self._learned_clauses = array("i")
+        # Conflict count of the next learned clause database reduction,
+        # the interval between reductions grows after each of them
+        self._reduce_interval = 2000
+        self._next_reduce = self._reduce_interval
+        # Watch lists indexed by literal, holding flat (clause, blocker)
+        # pairs of clause references and literals for the clauses of more
+        # than two literals whose first two literals contain it
+        self._watches = [[], []]
+        # Implication lists of the binary clauses indexed by literal,
+        # holding flat (other literal, clause) pairs for the binary clauses
+        # containing it
+        self._binaries = [[], []]
+        # Number of occurrences of every literal in the stored clauses
+        self._lit_scores = array("i", [0, 0])
         self._is_log = to_log
         if decider not in ["ORDERED", "VSIDS"]:
             raise ValueError('The decider must be one from the list ["ORDERED","VSIDS"]')
         self._decider = decider
+        # Built at the first search, from the literal occurrences
+        self._priority_queue = None
+        self._restart_policy = make_restart_policy(restart_policy)
+        # Rephasing resets the saved phases every few thousand conflicts,
+        # cycling through REPHASE_CYCLE, and decides with target phases
+        self._rephase = rephase
+        self._rephase_count = 0
+        self._rephase_interval = 1000
+        self._next_rephase = self._rephase_interval
+        # With a seed, the initial activities are perturbed and the
+        # initial phases are random, to diversify parallel solvers
+        self._random = random.Random(seed) if seed is not None else None
+        # Clause sharing callbacks, see share_clauses
+        self._clause_export = None
+        self._clause_import = None
+        self._share_max_lbd = 0
+        self._share_max_size = 0
+        # The clauses of the first file (or of the first _load_clauses
+        # call) are simplified by a Preprocessor, kept to extend the models;
+        # the variables of the assumptions of that solve are frozen
+        self._preprocess = preprocess
+        self._preprocessor = None
+        self._frozen_vars = ()
+        # With verify, the clauses given to the solver are kept as flat
+        # DIMACS literals terminated by 0, and every model is checked
+        # against them before solve returns SAT
+        self._original_literals = array("i") if verify else None
+        # Chronological backtracking: when a backjump would undo more than
+        # chrono levels, only the conflict level is undone. The trail is
+        # then no longer ordered by level, and implied literals get the
+        # highest level of their reason. None to always backjump
+        self._chrono = chrono
+        # Trail reuse: restarts keep the decisions which are more active
+        # than the next decision of VSIDS, as they would be made again
+        self._reuse_trail = reuse_trail
+        # Whether the initial phases were given by set_phases
+        self._phases_given = False
+        # DRAT proof of the learned and deleted clauses, see set_proof
+        self._proof = None
+        # Periodic progress reports, see set_progress
+        self._progress_interval = None
+        self._progress_callback = None
+        self._next_progress = 0
+        # Conflict count at the last restart
+        self._restart_conflicts = 0
+        # Budgets of every call to solve, see set_limits, and the limits
+        # of the current call: conflict and propagation counts, deadline
+        # and memory in bytes, None when unlimited
+        self._limits = {}
+        self._conflict_limit = None
+        self._propagation_limit = None
+        self._deadline = None
+        self._memory_limit = None
+        # Conflicts left before the next check of the time and memory
+        self._limit_countdown = LIMIT_CHECK_INTERVAL
+        # Set by interrupt, possibly from another thread or a signal
+        # handler, and cleared when the search stops because of it
+        self._interrupted = False
+        # Results of the last call to solve
+        self._model = None
+        self._failed_assumptions = []
         self.stats = Statistics()
+        self._init_assignment(0)
+
+    def _init_assignment(self, num_vars):
+        # Assignment store indexed by variable: value is -1 when the
+        # variable is unassigned, 0 for False and 1 for True; reason is
+        # the reference of the implying clause (-1 for decisions and units).
+        self._values = array("b", [-1]) * (num_vars + 1)
+        self._levels = array("i", [-1]) * (num_vars + 1)
+        self._reasons = array("i", [-1]) * (num_vars + 1)
+        self._trail_pos = array("i", [-1]) * (num_vars + 1)
+        # Per-variable marks used by conflict analysis
+        self._seen = array("b", [0]) * (num_vars + 1)
+        # Saved phase of every variable (its last value), used as the
+        # polarity of decisions, and the initial phases
+        self._saved_phase = array("b", [1]) * (num_vars + 1)
+        self._original_phase = array("b", [1]) * (num_vars + 1)
+        # Target phase: the largest trail since the last restart; best
+        # phase: the largest trail since the last rephasing
+        self._target_phase = array("b", [-1]) * (num_vars + 1)
+        self._target_size = 0
+        self._best_phase = array("b", [-1]) * (num_vars + 1)
+        self._best_size = 0
+        # Flat trail of the literals made true, in assignment order, and
+        # the trail position at which every decision level starts
+        self._trail = array("i")
+        self._trail_lim = array("i")
+        # Trail positions of the next literal to propagate through the
+        # binary clauses and through the longer clauses
+        self._bin_qhead = 0
+        self._qhead = 0
+
+    def _ensure_vars(self, num_vars):
+        """
+        Grow every per-variable and per-literal structure so that the
+        variables up to num_vars can be used.
+        """
+        grow = num_vars - self._num_vars
+        if grow <= 0:
+            return
+        self._values.extend(array("b", [-1]) * grow)
+        self._levels.extend(array("i", [-1]) * grow)
+        self._reasons.extend(array("i", [-1]) * grow)
+        self._trail_pos.extend(array("i", [-1]) * grow)
+        self._seen.extend(array("b", [0]) * grow)
+        if self._random is not None:
+            phases = array("b", (self._random.getrandbits(1) for i in range(grow)))
+        else:
+            phases = array("b", [1]) * grow
+        self._saved_phase.extend(phases)
+        self._original_phase.extend(phases)
+        self._target_phase.extend(array("b", [-1]) * grow)
+        self._best_phase.extend(array("b", [-1]) * grow)
+        self._lit_scores.extend(array("i", [0]) * (2 * grow))
+        self._watches.extend([] for i in range(0, 2 * grow))
+        self._binaries.extend([] for i in range(0, 2 * grow))
+        self._num_vars = num_vars
+        if self._priority_queue is not None:
+            self._priority_queue.extend(num_vars)
+
+    def _assign(self, literal, level, reason):
+        var = literal >> 1
+        self._values[var] = (literal & 1) ^ 1
+        self._levels[var] = level
+        self._reasons[var] = reason
+        self._trail_pos[var] = len(self._trail)
+        self._trail.append(literal)
+        return var
 
-    def _is_negative_literal(self, literal):
-        return literal > self._num_vars
-
-    def _get_literal_var(self, literal):
-        if self._is_negative_literal(literal):
-            return literal - self._num_vars
-        return literal
-
-    def _add_clause(self, clause):
-        clause = clause[:-1]
-        clause = list(OrderedDict.fromkeys(clause))
-        if len(clause) == 1:
-            # Get the literal
-            lit = clause[0]
-            value_to_set = True
-
-            if lit[0] == '-':
-                value_to_set = False
-                var = int(lit[1:])
-            else:
-                var = int(lit)
-
-            if var not in self._nodes_variable:
-                self.stats._num_implications += 1
-                node = AssignedNode(var, value_to_set, 0, None)
-                self._nodes_variable[var] = node
-                self._stack_of_decision.append(node)
-
-                node.index = len(self._stack_of_decision) - 1
-                if self._is_log:
-                    print("Implied(unary): ", node)
-            else:
-                node = self._nodes_variable[var]
-                if node.value != value_to_set:
-                    self.stats._result = "UNSAT"
-                    return 0
+    def _add_clause(self, clause, learned=False):
+        # Drop repeated literals, keeping the first occurrence of each
+        if len(set(clause)) != len(clause):
+            clause = list(dict.fromkeys(clause))
+        if clause:
+            max_var = max(map(abs, clause))
+            if max_var > self._num_vars:
+                self._ensure_vars(max_var)
+
+        # Drop the literals that are false at level 0, and the clause if
+        # one of its literals is true at level 0
+        values = self._values
+        clause_with_literals = []
+        for lit in map(to_literal, clause):
+            value = values[lit >> 1] ^ (lit & 1)
+            if value == 1:
+                return 1
+            if value < 0:
+                clause_with_literals.append(lit)
+
+        # A clause shortened at level 0 is a lemma of the proof
+        if self._proof is not None and (learned or len(clause_with_literals) < len(clause)):
+            self._proof.add(clause_with_literals)
+
+        if len(clause_with_literals) == 0:
+            self._ok = False
+            return 0
+        if len(clause_with_literals) == 1:
+            var = self._assign(clause_with_literals[0], 0, -1)
+            self.stats._num_implications += 1
+            if self._is_log:
+                print("Implied(unary): ", self._format_var(var))
             return 1
 
-        clause_with_literals = []
+        if learned:
+            # Deletable like the clauses learned by this solver
+            self._store_clause(clause_with_literals, len(clause_with_literals), learned=True)
+            return 1
+        lit_scores = self._lit_scores
+        for lit in clause_with_literals:
+            lit_scores[lit] += 1
+        self._store_clause(clause_with_literals, 0)
+        return 1
 
-        for lit in clause:
-            if lit[0] == '-':
-                var = int(lit[1:])
-                clause_with_literals.append(var + self._num_vars)
-                if self._decider == "VSIDS":
-                    self._lit_scores[var + self._num_vars] += 1
-            else:
-                var = int(lit)
-                clause_with_literals.append(var)
-                if self._decider == "VSIDS":
-                    self._lit_scores[var] += 1
-        clause_id = self._num_clauses
-        self._clauses.append(clause_with_literals)
+    def _store_clause(self, clause, lbd, learned=False):
+        """
+        Append a clause to the arena and watch it.
+
+        Parameters:
+            clause: list of at least two internal literals
+            lbd: LBD of the clause, 0 for the clauses of the formula
+            learned: whether the clause can be deleted by reductions
+
+        Return:
+            the reference of the clause
+        """
+        arena = self._arena
+        # Header words in the order of their offsets, from CLAUSE_ACTIVITY
+        arena.extend((0, lbd, LEARNED if learned else 0, len(clause)))
+        cref = len(arena)
+        arena.extend(clause)
+        if learned:
+            self._learned_clauses.append(cref)
         self._num_clauses += 1
-        watch_literal1 = clause_with_literals[0]
-        watch_literal2 = clause_with_literals[1]
-
-        self._literals_watching_c[clause_id] = [watch_literal1, watch_literal2]
-        self._clauses_watched_by_l.setdefault(watch_literal1, []).append(clause_id)
-        self._clauses_watched_by_l.setdefault(watch_literal2, []).append(clause_id)
-        return 1
+        self._watch_clause(cref, clause)
+        return cref
+
+    def _watch_clause(self, cref, clause):
+        if len(clause) == 2:
+            self._binaries[clause[0]].extend((clause[1], cref))
+            self._binaries[clause[1]].extend((clause[0], cref))
+            return
+        # The watched literals are always clause[0] and clause[1], each
+        # using the other one as blocker
+        self._watches[clause[0]].extend((cref, clause[1]))
+        self._watches[clause[1]].extend((cref, clause[0]))
+
+    def _clause_literals(self, cref):
+        arena = self._arena
+        return arena[cref:cref + arena[cref + CLAUSE_SIZE]]
+
+    def _format_var(self, var):
+        return "Var: {} Val: {} Lev: {} Cls: {} Ind: {} ".format(
+                var, self._values[var] == 1, self._levels[var],
+                self._reasons[var], self._trail_pos[var])
+
+    def add_clause(self, clause):
+        """
+        Add a clause between calls to solve. Variables that were not
+        used before are created as needed.
+
+        Parameters:
+            clause: iterable of non-zero DIMACS literals
+
+        Return:
+            False if the clauses are now known to be unsatisfiable
+        """
+        clause = list(clause)
+        self._check_not_eliminated(clause)
+        if self._original_literals is not None:
+            self._original_literals.extend(clause)
+            self._original_literals.append(0)
+        if self._level > 0:
+            self._backtrack(0, -1, -1)
+        if self._ok:
+            self._add_clause(clause)
+        return self._ok
+
+    def _check_not_eliminated(self, literals):
+        if self._preprocessor is not None:
+            eliminated = [lit for lit in literals if abs(lit) in self._preprocessor.eliminated]
+            if eliminated:
+                raise ValueError("Variables eliminated by preprocessing cannot be used: "
+                                 + str(eliminated))
+
+    def share_clauses(self, export, receive, max_lbd=2, max_size=8):
+        """
+        Exchange learned clauses with other solvers working on the same
+        formula.
+
+        Parameters:
+            export: called with every learned clause (a list of DIMACS
+                    literals) which is unit, has an LBD at most max_lbd
+                    or at most max_size literals
+            receive: called at every restart, returns an iterable of
+                     clauses (lists of DIMACS literals) implied by the
+                     formula, which are added as learned clauses
+            max_lbd, max_size: limits of the exported clauses
+
+        Return:
+            None
+        """
+        self._clause_export = export
+        self._clause_import = receive
+        self._share_max_lbd = max_lbd
+        self._share_max_size = max_size
+
+    def set_proof(self, proof):
+        """
+        Log a DRAT proof of the following calls to solve: every learned
+        clause, every deleted learned clause and the empty clause when
+        the formula is UNSAT. Clauses imported from other solvers with
+        share_clauses are logged as lemmas, but cannot be checked.
+
+        Parameters:
+            proof: a DratWriter, None to stop logging
+
+        Return:
+            None
+        """
+        self._proof = proof
+
+    def set_progress(self, interval, callback=None):
+        """
+        Report the progress of the search every interval seconds.
+
+        Parameters:
+            interval: seconds between two reports, None to stop reporting
+            callback: called with the Statistics at every report, by
+                      default its progress line is printed
+
+        Return:
+            None
+        """
+        self._progress_interval = interval
+        self._progress_callback = callback
+        self._next_progress = time.time() + interval if interval is not None else 0
+
+    def set_phases(self, phases):
+        """
+        Set the initial phases of the decisions, for instance to the best
+        assignment of a local search. Rephasing to the original phases
+        also goes back to them.
+
+        Parameters:
+            phases: dictionary of variable to boolean value
+
+        Return:
+            None
+        """
+        if phases:
+            self._ensure_vars(max(phases))
+        for var, value in phases.items():
+            self._saved_phase[var] = self._original_phase[var] = int(value)
+        self._phases_given = True
+
+    def set_limits(self, conflicts=None, propagations=None, time=None, memory=None):
+        """
+        Limit the resources of every following call to solve, which returns
+        "UNKNOWN" when one of them is exhausted. The solver is then back at
+        level 0 with its learned clauses, so solve can be called again. The
+        limits are checked after every conflict and every decision, the
+        time and memory ones every LIMIT_CHECK_INTERVAL of them.
+
+        Parameters:
+            conflicts: maximum number of conflicts of a call
+            propagations: maximum number of propagated literals of a call
+            time: maximum wall-clock seconds of a call, reading included
+            memory: maximum resident set size of the process in bytes
+
+        Return:
+            None
+        """
+        self._limits = {"conflicts": conflicts, "propagations": propagations,
+                        "time": time, "memory": memory}
+
+    def interrupt(self):
+        """
+        Ask the running (or the next) call to solve to stop and return
+        "UNKNOWN" at its next conflict or decision; a call which ends
+        first forgets the request. Only sets a flag, so it can be called
+        from another thread or from a signal handler.
+        """
+        self._interrupted = True
+
+    def _start_limits(self, start_time):
+        # Turn the budgets into limits of the counters of this call
+        stats = self.stats
+        limits = self._limits
+        self._conflict_limit = self._propagation_limit = None
+        self._deadline = self._memory_limit = None
+        if limits.get("conflicts") is not None:
+            self._conflict_limit = stats._num_conflicts + limits["conflicts"]
+        if limits.get("propagations") is not None:
+            self._propagation_limit = stats._num_propagations + limits["propagations"]
+        if limits.get("time") is not None:
+            self._deadline = start_time + limits["time"]
+        self._memory_limit = limits.get("memory")
+        self._limit_countdown = LIMIT_CHECK_INTERVAL
+
+    def _exhausted_limit(self):
+        """
+        Return:
+            the reason to stop the search ("interrupt" or one of LIMITS),
+            or None to go on
+        """
+        if self._interrupted:
+            self._interrupted = False
+            return "interrupt"
+        stats = self.stats
+        if self._conflict_limit is not None and stats._num_conflicts >= self._conflict_limit:
+            return "conflicts"
+        if (self._propagation_limit is not None
+                and stats._num_propagations >= self._propagation_limit):
+            return "propagations"
+        self._limit_countdown -= 1
+        if self._limit_countdown <= 0:
+            self._limit_countdown = LIMIT_CHECK_INTERVAL
+            if self._deadline is not None and time.time() >= self._deadline:
+                return "time"
+            if self._memory_limit is not None and _memory_usage() >= self._memory_limit:
+                return "memory"
+        return None
+
+    def _stop_search(self):
+        # Called after every conflict and decision: when a limit is
+        # exhausted, the reason is recorded and the solver goes back to
+        # level 0
+        reason = self._exhausted_limit()
+        if reason is None:
+            return False
+        self.stats._stop_reason = reason
+        self._backtrack(0, -1, -1)
+        return True
+
+    def _report_progress(self):
+        self._next_progress = time.time() + self._progress_interval
+        self._copy_heap_stats()
+        if self._progress_callback is not None:
+            self._progress_callback(self.stats)
+        else:
+            print(self.stats.progress_line(), flush=True)
+
+    def _copy_heap_stats(self):
+        queue = self._priority_queue
+        if queue is not None:
+            self.stats._heap_pops = queue.num_pops
+            self.stats._heap_inserts = queue.num_inserts
+            self.stats._heap_bumps = queue.num_bumps
+
+    def _export_clause(self, literal, cref, lbd):
+        if cref == -1:
+            self._clause_export([to_dimacs(literal)])
+            return
+        clause = self._clause_literals(cref)
+        if lbd <= self._share_max_lbd or len(clause) <= self._share_max_size:
+            self._clause_export([to_dimacs(lit) for lit in clause])
+
+    def _import_clauses(self):
+        # Called at level 0, right after a restart
+        for clause in self._clause_import():
+            self.stats._num_imported_clauses += 1
+            if not self._add_clause(clause, learned=True):
+                return
+
+    def get_model(self):
+        """
+        Return:
+            dictionary of every variable to its boolean value in the
+            model found by the last call to solve, None if it was not SAT
+        """
+        if self._model is None:
+            return None
+        model = self._model
+        model = {var: model[var] == 1 for var in range(1, len(model))}
+        if self._preprocessor is not None:
+            self._preprocessor.extend_model(model)
+        return model
+
+    def get_failed_assumptions(self):
+        """
+        Return:
+            the assumptions (DIMACS literals) that made the last call to
+            solve UNSAT, empty if the clauses are UNSAT without assumptions
+        """
+        return list(self._failed_assumptions)
+
+    def _read_file(self, cnf_filename, use_cache=True):
+        cache = load_cache(cnf_filename) if use_cache else None
+        if cache is not None:
+            with cache:
+                self._load_clauses(cache.num_vars, cache.num_clauses, cache.clauses())
+        else:
+            with DimacsReader(cnf_filename) as reader:
+                num_vars, num_clauses = reader.read_header()
+                self._load_clauses(num_vars, num_clauses, reader.clauses())
+
+    def _load_clauses(self, num_vars, num_clauses, clauses):
+        self._ensure_vars(num_vars)
+        self.stats._num_orig_clauses += num_clauses
+        if self._original_literals is not None:
+            clauses = self._record_clauses(clauses)
+        if self._preprocess and self._preprocessor is None:
+            self._load_preprocessed(clauses)
+            return
+        for clause in clauses:
+            ret = self._add_clause(clause)
+            if ret == 0:
+                break
 
-    def _read_file(self, cnf_filename):
-        cnf_file = open(cnf_filename, "r")
-        lines = [
-            line.strip().split() for line in cnf_file.readlines()
-            if (not (line.startswith('c') or
-                     line.startswith('%') or
-                     line.startswith('0'))
-                and line != '\n')
-        ]
-        for line in lines:
-            first_word = line[0]
-            if first_word == "p":
-                self._num_vars = int(line[2])
-                if self._decider == "VSIDS":
-                    self._lit_scores = [0 for i in range(0, 2 * self._num_vars + 1)]
-                self.stats._num_orig_clauses = int(line[3])
-            else:
-                ret = self._add_clause(line)
-                if ret == 0:
+    def _record_clauses(self, clauses):
+        original_literals = self._original_literals
+        for clause in clauses:
+            original_literals.extend(clause)
+            original_literals.append(0)
+            yield clause
+
+    def _verify_model(self):
+        """
+        Check the model of the last call to solve against the clauses
+        given to the solver, see check_model.
+        """
+        check_model(self._original_literals, self.get_model(), self.stats)
+
+    def _load_preprocessed(self, clauses):
+        start = time.time()
+        # The clauses already stored (added before, or learned) and the
+        # units on the trail are not seen by the preprocessor, so their
+        # variables are frozen like those of the assumptions
+        frozen = self._used_vars()
+        frozen.update(self._frozen_vars)
+        preprocessor = Preprocessor(clauses, frozen, self._proof)
+        self._preprocessor = preprocessor
+        self._ensure_vars(preprocessor.num_vars)
+        if preprocessor.run():
+            for lit in preprocessor.units():
+                self._add_clause([lit])
+            for clause in preprocessor.clauses():
+                if not self._add_clause(clause):
                     break
-
-        if self._decider == "VSIDS":
-            self._priority_queue = PriorityQueue(self._lit_scores)
-            self._incr = 1
-
-            for node in self._stack_of_decision:
-                self._priority_queue.remove(node.var)
-                self._priority_queue.remove(node.var + self._num_vars)
-        cnf_file.close()
+            # The eliminated variables occur in no clause: they are set at
+            # level 0 so that they are never decided, and their values are
+            # computed by extend_model
+            for var in preprocessor.eliminated:
+                if self._values[var] == -1:
+                    self._assign(2 * var + 1, 0, -1)
+            if self._ok:
+                self._probe()
+        else:
+            self._ok = False
+        self.stats._num_eliminated_vars = len(preprocessor.eliminated)
+        self.stats._num_fixed_vars = len(preprocessor.units())
+        self.stats._num_equivalent_vars = preprocessor.num_substituted
+        self.stats._num_preprocessed_clauses = preprocessor.num_clauses()
+        self.stats._preprocess_time = time.time() - start
+
+    def _used_vars(self):
+        """
+        Return:
+            the set of the variables of the stored clauses and of the trail
+        """
+        used = {lit >> 1 for lit in self._trail}
+        arena = self._arena
+        start = 0
+        while start < len(arena):
+            cref = start + HEADER_SIZE
+            start = cref + arena[cref + CLAUSE_SIZE]
+            used.update(lit >> 1 for lit in arena[cref:start])
+        return used
+
+    def _probe(self, max_probes=PROBE_LIMIT):
+        """
+        Failed literal probing at level 0. Both polarities of the variables
+        at the roots of the binary implication graph (literals implying
+        others through binary clauses but implied by none) are propagated
+        in turn: a polarity leading to a conflict is a failed literal whose
+        negation is fixed, and a literal implied by both polarities is a
+        necessary assignment, fixed as well.
+
+        Parameters:
+            max_probes: maximum number of variables probed
+        """
+        if self._unit_propagate() != -1:
+            self._refute()
+            return
+        # A literal implies others through the binary clauses of its
+        # negation, and is implied through its own
+        binaries = self._binaries
+        roots = sorted({lit >> 1 for lit in range(2, 2 * self._num_vars + 2)
+                        if binaries[lit ^ 1] and not binaries[lit]})[:max_probes]
+
+        values = self._values
+        trail = self._trail
+        for var in roots:
+            implied_by_both = None
+            for literal in (2 * var, 2 * var + 1):
+                if values[var] != -1:
+                    break
+                start = len(trail)
+                self._level = 1
+                self._trail_lim.append(start)
+                self._assign(literal, 1, -1)
+                conflict = self._unit_propagate()
+                implied_literals = trail[start + 1:]
+                for lit in reversed(trail[start:]):
+                    values[lit >> 1] = -1
+                del trail[start:]
+                self._trail_lim.pop()
+                self._level = 0
+                self._bin_qhead = self._qhead = start
+                if conflict != -1:
+                    self.stats._num_failed_literals += 1
+                    if not self._fix(literal ^ 1):
+                        return
+                    break
+                if implied_by_both is None:
+                    implied_by_both = set(implied_literals)
+                else:
+                    for lit in implied_by_both.intersection(implied_literals):
+                        if values[lit >> 1] == -1:
+                            self.stats._num_necessary_assignments += 1
+                            if self._proof is not None:
+                                self._proof.add([2 * var + 1, lit])
+                                self._proof.add([2 * var, lit])
+                            if not self._fix(lit):
+                                return
+
+    def _fix(self, literal):
+        # Assign a literal derived by probing at level 0 and propagate it
+        if self._proof is not None:
+            self._proof.add([literal])
+        self._assign(literal, 0, -1)
+        if self._unit_propagate() != -1:
+            self._refute()
+            return False
+        return True
+
+    def _refute(self):
+        # A conflict at level 0: the formula is UNSAT
+        self._ok = False
+        if self._proof is not None:
+            self._proof.add([])
+
+    def _init_decider(self):
+        if self._decider != "VSIDS" or self._priority_queue is not None:
+            return
+        # Start with the polarity occurring in more clauses, unless the
+        # phases are random or given
+        lit_scores = self._lit_scores
+        if self._random is None and not self._phases_given:
+            for var in range(1, self._num_vars + 1):
+                if lit_scores[2 * var] < lit_scores[2 * var + 1]:
+                    self._saved_phase[var] = 0
+            self._original_phase[:] = self._saved_phase
+
+        # Initial activity of a variable: its number of occurrences, with
+        # a random part below 1 when seeded. Assigned variables stay in
+        # the queue until they are popped
+        rand = self._random.random if self._random is not None else float
+        self._priority_queue = PriorityQueue(
+            [lit_scores[2 * var] + lit_scores[2 * var + 1] + rand() if var else 0
+             for var in range(0, self._num_vars + 1)])
 
     def _decide(self):
         var = 0
-        value_to_set = False
         if self._decider == "ORDERED":
             var = -1
+            values = self._values
             for x in range(1, self._num_vars + 1):
-                if x not in self._nodes_variable:
+                if values[x] == -1:
                     var = x
                     break
 
-            value_to_set = True
-
         elif self._decider == "VSIDS":
-            literal = self._priority_queue.get_top()
-
-            if literal == -1:
-                var = -1
-            else:
-                var = self._get_literal_var(literal)
-
-                is_neg_literal = self._is_negative_literal(literal)
-
-                value_to_set = not is_neg_literal
-
-                if is_neg_literal:
-                    self._priority_queue.remove(var)
-                else:
-                    self._priority_queue.remove(var + self._num_vars)
+            # Skip the variables assigned since they were queued
+            values = self._values
+            var = self._priority_queue.get_top()
+            while var != -1 and values[var] != -1:
+                var = self._priority_queue.get_top()
         if var == -1:
             return -1
+        value_to_set = self._saved_phase[var]
+        if self._rephase and self._target_phase[var] != -1:
+            value_to_set = self._target_phase[var]
+        self._new_decision(2 * var + 1 - value_to_set)
+        return var
+
+    def _new_decision(self, literal):
         # Increase the level by 1
         self._level += 1
-        new_node = AssignedNode(var, value_to_set, self._level, None)
-        self._nodes_variable[var] = new_node
-        self._stack_of_decision.append(new_node)
-        new_node.index = len(self._stack_of_decision) - 1
+        self._trail_lim.append(len(self._trail))
+        var = self._assign(literal, self._level, -1)
 
         # Increase the number of decisions
         self.stats._num_decisions += 1
@@ -207,295 +920,1005 @@ class SAT:
         # Log if _is_log is true
         if self._is_log:
             print("Choosen decision: ", end="")
-            print(new_node)
-        return var
-
-    def _unit_propagate(self, is_first_time):
-        last_assignment_pointer = len(self._stack_of_decision) - 1
-        if is_first_time:
-            last_assignment_pointer = 0
-        while last_assignment_pointer < len(self._stack_of_decision):
-            last_assigned_node = self._stack_of_decision[last_assignment_pointer]
-            if last_assigned_node.value:
-                literal_that_is_falsed = last_assigned_node.var + self._num_vars
-            else:
-                literal_that_is_falsed = last_assigned_node.var
-            itr = 0
-
-            clauses_watched_by_falsed_literal = self._clauses_watched_by_l.setdefault(literal_that_is_falsed, []).copy()
-            clauses_watched_by_falsed_literal.reverse()
-            # conflict
-            while itr < len(clauses_watched_by_falsed_literal):
-                clause_id = clauses_watched_by_falsed_literal[itr]
-                watch_list_of_clause = self._literals_watching_c[clause_id]
-
-                other_watch_literal = watch_list_of_clause[0]
-                if other_watch_literal == literal_that_is_falsed:
-                    other_watch_literal = watch_list_of_clause[1]
-
-                other_watch_var = self._get_literal_var(other_watch_literal)
-                is_negative_other = self._is_negative_literal(other_watch_literal)
-
-                if other_watch_var in self._nodes_variable:
-                    value_assgned = self._nodes_variable[other_watch_var].value
-                    if (is_negative_other and not value_assgned) or (
-                            not is_negative_other and value_assgned):
-                        itr += 1
+            print(self._format_var(var))
+
+    def _unit_propagate(self):
+        """
+        Propagate every trail literal from the queue heads onwards. The
+        binary clauses of all the pending literals are propagated first,
+        from the implication lists, before the longer clauses of the next
+        literal. Watch lists are compacted in place while they are walked:
+        entries that stay are copied down to position j and the tail is
+        truncated.
+
+        Return:
+            the reference of a conflicting clause, or -1 if there is no
+            conflict
+        """
+        values = self._values
+        trail = self._trail
+        arena = self._arena
+        watches = self._watches
+        binaries = self._binaries
+        levels = self._levels
+        reasons = self._reasons
+        trail_pos = self._trail_pos
+        level = self._level
+        # With chronological backtracking, an implied literal gets the
+        # highest level of the false literals of its reason
+        chrono = self._chrono is not None
+        qhead = qhead_start = self._qhead
+        bin_qhead = self._bin_qhead
+        while qhead < len(trail):
+            while bin_qhead < len(trail):
+                propagated = trail[bin_qhead]
+                implications = binaries[propagated ^ 1]
+                bin_qhead += 1
+                for i in range(0, len(implications), 2):
+                    other = implications[i]
+                    value = values[other >> 1] ^ (other & 1)
+                    if value == 1:
                         continue
-
-                new_literal_to_watch = -1
-                clause = self._clauses[clause_id]
-
-                for lit in clause:
-                    if lit not in watch_list_of_clause:
-                        var_of_lit = self._get_literal_var(lit)
-
-                        if var_of_lit not in self._nodes_variable:
-                            new_literal_to_watch = lit
-                            break
-                        else:
-                            node = self._nodes_variable[var_of_lit]
-                            is_negative = self._is_negative_literal(lit)
-                            if (is_negative and not node.value) or (not is_negative and node.value):
-                                new_literal_to_watch = lit
-                                break
-
-                if new_literal_to_watch != -1:
-                    self._literals_watching_c[clause_id].remove(literal_that_is_falsed)
-                    self._literals_watching_c[clause_id].append(new_literal_to_watch)
-                    self._clauses_watched_by_l.setdefault(literal_that_is_falsed, []).remove(clause_id)
-                    self._clauses_watched_by_l.setdefault(new_literal_to_watch, []).append(clause_id)
-
-                else:
-                    if other_watch_var not in self._nodes_variable:
-                        value_to_set = not is_negative_other
-                        assign_var_node = AssignedNode(other_watch_var, value_to_set, self._level, clause_id)
-                        self._nodes_variable[other_watch_var] = assign_var_node
-                        self._stack_of_decision.append(assign_var_node)
-                        assign_var_node.index = len(self._stack_of_decision) - 1
-
-                        if self._decider == "VSIDS":
-                            self._priority_queue.remove(other_watch_var)
-                            self._priority_queue.remove(other_watch_var + self._num_vars)
-
+                    cref = implications[i + 1]
+                    if value < 0:
+                        # The implied literal is the first one of its reason
+                        if arena[cref] != other:
+                            arena[cref + 1] = arena[cref]
+                            arena[cref] = other
+                        var = other >> 1
+                        values[var] = (other & 1) ^ 1
+                        levels[var] = levels[propagated >> 1] if chrono else level
+                        reasons[var] = cref
+                        trail_pos[var] = len(trail)
+                        trail.append(other)
                         self.stats._num_implications += 1
-
                         if self._is_log:
                             print("Implied decision:", end="")
-                            print(assign_var_node)
+                            print(self._format_var(other >> 1))
                     else:
-                        conflict_node = AssignedNode(None, None, self._level, clause_id)
-                        self._stack_of_decision.append(conflict_node)
-
-                        conflict_node.index = len(self._stack_of_decision) - 1
+                        self.stats._num_propagations += qhead - qhead_start
+                        self._bin_qhead = self._qhead = len(trail)
                         if self._is_log:
                             print("CONFLICT")
-                        return "CONFLICT"
-                itr += 1
-            last_assignment_pointer += 1
-        return "NO_CONFLICT"
-
-    def _binary_resolute(self, clause1, clause2, var):
-        full_clause = clause1 + clause2
-
-        full_clause = list(OrderedDict.fromkeys(full_clause))
-        full_clause.remove(var)
-        full_clause.remove(var + self._num_vars)
-        return full_clause
-
-    def _is_valid_clause(self, clause, level):
-        counter = 0
-        maxi = -1
-        cand = -1
-
-        for lit in clause:
-            var = self._get_literal_var(lit)
-            node = self._nodes_variable[var]
-
-            if node.level == level:
-                counter += 1
-                if node.index > maxi:
-                    maxi = node.index
-                    cand = node
-
-        # Conflict is valid if counter == 1, so return counter == 1
-        return counter == 1, cand
-
-    def _get_backtrack_level(self, conflict_clause, conflict_level):
-        maximum_level_before_conflict_level = -1
-        literal_at_conflict_level = -1
-
-        for lit in conflict_clause:
-            var = self._get_literal_var(lit)
-            assigned_node = self._nodes_variable[var]
-
-            if assigned_node.level == conflict_level:
-                literal_at_conflict_level = lit
-            else:
-                if assigned_node.level > maximum_level_before_conflict_level:
-                    maximum_level_before_conflict_level = assigned_node.level
-        return maximum_level_before_conflict_level, literal_at_conflict_level
-
-    def _analyze_conflict(self):
-        assigment_stack_pointer = len(self._stack_of_decision) - 1
-        conflict_node = self._stack_of_decision[assigment_stack_pointer]
-        conflict_level = conflict_node.level
-        conflict_clause = self._clauses[conflict_node.clause]
+                        return cref
+
+            literal_that_is_falsed = trail[qhead] ^ 1
+            qhead += 1
+
+            watch_list = watches[literal_that_is_falsed]
+            i = 0
+            j = 0
+            end = len(watch_list)
+            while i < end:
+                cref = watch_list[i]
+                blocker = watch_list[i + 1]
+                i += 2
+
+                # Skip the clause without touching it if its blocker is true
+                # (the value of a literal is 1 if true, 0 if false and
+                # negative if unassigned)
+                if values[blocker >> 1] ^ (blocker & 1) == 1:
+                    watch_list[j] = cref
+                    watch_list[j + 1] = blocker
+                    j += 2
+                    continue
+
+                # Make sure the falsified literal is at position 1
+                other_watch_literal = arena[cref]
+                if other_watch_literal == literal_that_is_falsed:
+                    other_watch_literal = arena[cref + 1]
+                    arena[cref] = other_watch_literal
+                    arena[cref + 1] = literal_that_is_falsed
+
+                other_value = values[other_watch_literal >> 1] ^ (other_watch_literal & 1)
+                if other_value == 1:
+                    watch_list[j] = cref
+                    watch_list[j + 1] = other_watch_literal
+                    j += 2
+                    continue
+
+                # Look for a non-false literal to watch instead
+                clause_end = cref + arena[cref + CLAUSE_SIZE]
+                found = False
+                for k in range(cref + 2, clause_end):
+                    lit = arena[k]
+                    if values[lit >> 1] ^ (lit & 1) == 0:
+                        continue
+                    arena[cref + 1] = lit
+                    arena[k] = literal_that_is_falsed
+                    watches[lit].extend((cref, other_watch_literal))
+                    found = True
+                    break
+                if found:
+                    continue
+
+                # The clause is unit or conflicting, it keeps its watches
+                watch_list[j] = cref
+                watch_list[j + 1] = other_watch_literal
+                j += 2
+                if other_value < 0:
+                    implied_level = level
+                    if chrono and levels[literal_that_is_falsed >> 1] != level:
+                        implied_level = max(levels[arena[k] >> 1] for k in range(cref + 1, clause_end))
+                    self._assign(other_watch_literal, implied_level, cref)
+                    self.stats._num_implications += 1
+
+                    if self._is_log:
+                        print("Implied decision:", end="")
+                        print(self._format_var(other_watch_literal >> 1))
+                else:
+                    while i < end:
+                        watch_list[j] = watch_list[i]
+                        j += 1
+                        i += 1
+                    del watch_list[j:]
+                    self.stats._num_propagations += qhead - qhead_start
+                    self._bin_qhead = self._qhead = len(trail)
+                    if self._is_log:
+                        print("CONFLICT")
+                    return cref
+            del watch_list[j:]
+        self._bin_qhead = self._qhead = qhead
+        self.stats._num_propagations += qhead - qhead_start
+        return -1
+
+    def _analyze_conflict(self, conflict_clause_id):
+        """
+        First-UIP conflict analysis. The trail is walked backwards from the
+        conflict, resolving on the marked variables of the conflict level
+        until a single one is left, the learned clause is minimized and
+        the backjump level is taken from its second highest level.
+
+        Parameters:
+            conflict_clause_id: reference of the clause falsified by
+                                propagation
+
+        Return:
+            the backtrack level (-1 when the formula is UNSAT), the
+            asserting literal, the reference of the learned clause (-1
+            if the learned clause is unit) and its LBD
+        """
+        conflict_level = self._level
 
-        self._stack_of_decision.pop()
         if self._is_log:
-            print("Analyzing Conflict in the node: ", end="")
-            print(conflict_node)
+            print("Analyzing Conflict in the clause: ", conflict_clause_id)
 
         if conflict_level == 0:
-            return -1, None
+            return -1, None, -1, 0
+
+        levels = self._levels
+        reasons = self._reasons
+        trail = self._trail
+        seen = self._seen
+        arena = self._arena
+        # Every variable involved in the conflict is bumped
+        bump = self._priority_queue.bump if self._decider == "VSIDS" else None
+
+        # Slot 0 is filled with the asserting literal at the end
+        conflict_clause = [0]
+        path_count = 0
+        index = len(trail) - 1
+        cref = conflict_clause_id
+        start = 0
         while True:
-            is_nice, prev_assigned_node = self._is_valid_clause(conflict_clause, conflict_level)
-
-            if is_nice:
+            arena[cref + CLAUSE_ACTIVITY] += 1
+            for k in range(cref + start, cref + arena[cref + CLAUSE_SIZE]):
+                lit = arena[k]
+                var = lit >> 1
+                if not seen[var] and levels[var] > 0:
+                    seen[var] = 1
+                    if bump:
+                        bump(var)
+                    if levels[var] >= conflict_level:
+                        path_count += 1
+                    else:
+                        conflict_clause.append(lit)
+
+            # Select the next marked literal of the trail to resolve on,
+            # skipping the ones of lower levels placed above the conflict
+            # level by chronological backtracking
+            lit = trail[index]
+            while not seen[lit >> 1] or levels[lit >> 1] < conflict_level:
+                index -= 1
+                lit = trail[index]
+            index -= 1
+            var = lit >> 1
+            seen[var] = 0
+            path_count -= 1
+            if path_count == 0:
                 break
-            if self._is_log:
-                print("Clause: ", conflict_clause)
-                print("Node_to_use ", prev_assigned_node)
-            clause = self._clauses[prev_assigned_node.clause]
-            var = prev_assigned_node.var
-            conflict_clause = self._binary_resolute(conflict_clause, clause, var)
+            # The implied literal is the first one of its reason clause
+            cref = reasons[var]
+            start = 1
 
-        if self._is_log:
-            print("Conflict Clause: ", conflict_clause)
+        conflict_level_literal = lit ^ 1
+        conflict_clause[0] = conflict_level_literal
 
-        if len(conflict_clause) > 1:
-            self.stats._num_learned_clauses += 1
-            clause_id = self._num_clauses
-            self._num_clauses += 1
-            self._clauses.append(conflict_clause)
+        to_clear = conflict_clause[1:]
+        conflict_clause = self._minimize_clause(conflict_clause, to_clear)
+        for lit in to_clear:
+            seen[lit >> 1] = 0
 
-            self._clauses_watched_by_l.setdefault(conflict_clause[0], []).append(clause_id)
-            self._clauses_watched_by_l.setdefault(conflict_clause[1], []).append(clause_id)
+        if self._is_log:
+            print("Conflict Clause: ", conflict_clause)
 
-            self._literals_watching_c[clause_id] = [conflict_clause[0], conflict_clause[1]]
+        if self._decider == "VSIDS":
+            self._priority_queue.decay()
 
-            if self._decider == "VSIDS":
-                for l in conflict_clause:
-                    self._lit_scores[l] += self._incr
-                    self._priority_queue.increase_update(l, self._incr)
-                self._incr += 0.75
+        if len(conflict_clause) == 1:
+            return 0, conflict_level_literal, -1, 1
 
-            backtrack_level, conflict_level_literal = self._get_backtrack_level(conflict_clause, conflict_level)
+        # Watch the asserting literal and the literal of the highest
+        # level below it, which gives the backjump level
+        second = 1
+        backtrack_level = 0
+        for k in range(1, len(conflict_clause)):
+            level = levels[conflict_clause[k] >> 1]
+            if level > backtrack_level:
+                backtrack_level = level
+                second = k
+        conflict_clause[1], conflict_clause[second] = conflict_clause[second], conflict_clause[1]
 
-            conflict_level_var = self._get_literal_var(conflict_level_literal)
+        # Literal block distance: the number of distinct decision levels
+        lbd = len({levels[lit >> 1] for lit in conflict_clause})
 
-            is_negative_conflict_lit = self._is_negative_literal(conflict_level_literal)
+        self.stats._num_learned_clauses += 1
+        cref = self._store_clause(conflict_clause, lbd, learned=True)
 
-            value_to_set = True
-            if is_negative_conflict_lit:
-                value_to_set = False
-            node = AssignedNode(conflict_level_var, value_to_set, backtrack_level, clause_id)
+        if self._is_log:
+            print("Backtracking to level ", backtrack_level)
+            print("Literal after backtrack ", conflict_level_literal)
+        return backtrack_level, conflict_level_literal, cref, lbd
+
+    def _minimize_clause(self, conflict_clause, to_clear):
+        """
+        Recursive learned clause minimization: a literal is dropped when
+        its reason clause only contains literals that are in the learned
+        clause or are themselves (recursively) implied by such literals.
+
+        Parameters:
+            conflict_clause: the learned clause, asserting literal first
+            to_clear: list of the literals whose variables are marked as
+                      seen, extended with every variable marked here
+
+        Return:
+            the minimized learned clause
+        """
+        levels = self._levels
+        reasons = self._reasons
+        # Bit set of the levels in the clause, used to abort early when
+        # a reason contains a literal of a level not in the clause
+        abstract_levels = 0
+        for k in range(1, len(conflict_clause)):
+            abstract_levels |= 1 << (levels[conflict_clause[k] >> 1] & 31)
+
+        minimized = [conflict_clause[0]]
+        for k in range(1, len(conflict_clause)):
+            lit = conflict_clause[k]
+            var = lit >> 1
+            if reasons[var] == -1 or not self._is_redundant(var, abstract_levels, to_clear):
+                minimized.append(lit)
+        return minimized
+
+    def _is_redundant(self, var, abstract_levels, to_clear):
+        levels = self._levels
+        reasons = self._reasons
+        seen = self._seen
+        arena = self._arena
+        stack = [var]
+        top = len(to_clear)
+        while stack:
+            cref = reasons[stack.pop()]
+            for k in range(cref + 1, cref + arena[cref + CLAUSE_SIZE]):
+                lit = arena[k]
+                var = lit >> 1
+                if seen[var] or levels[var] == 0:
+                    continue
+                if reasons[var] != -1 and (1 << (levels[var] & 31)) & abstract_levels:
+                    seen[var] = 1
+                    stack.append(var)
+                    to_clear.append(lit)
+                else:
+                    # Undo the marks made while checking this literal
+                    for k in range(top, len(to_clear)):
+                        seen[to_clear[k] >> 1] = 0
+                    del to_clear[top:]
+                    return False
+        return True
+
+    def _analyze_final(self, literal):
+        """
+        Compute the assumptions responsible for an assumption being false.
+
+        Parameters:
+            literal: the assumption literal found false
+
+        Return:
+            the list of failed assumptions (DIMACS literals), including
+            the given one
+        """
+        failed = [to_dimacs(literal)]
+        var = literal >> 1
+        if self._levels[var] == 0:
+            return failed
+        levels = self._levels
+        reasons = self._reasons
+        seen = self._seen
+        trail = self._trail
+        seen[var] = 1
+        for index in range(len(trail) - 1, self._trail_lim[0] - 1, -1):
+            lit = trail[index]
+            var = lit >> 1
+            if not seen[var]:
+                continue
+            if reasons[var] == -1:
+                # Decisions below the assumption levels are assumptions
+                failed.append(to_dimacs(lit))
+            else:
+                clause = self._clause_literals(reasons[var])
+                for k in range(1, len(clause)):
+                    if levels[clause[k] >> 1] > 0:
+                        seen[clause[k] >> 1] = 1
+            seen[var] = 0
+        seen[literal >> 1] = 0
+        return failed
+
+    def _backtrack(self, backtrack_level, literal_to_add, reason, literal_level=None):
+        """
+        Undo the decision levels above backtrack_level, then assign
+        literal_to_add (unless -1) with the given reason, at
+        literal_level or by default at backtrack_level.
+        """
+        self._level = backtrack_level
+        if backtrack_level < len(self._trail_lim):
+            trail = self._trail
+            values = self._values
+            saved_phase = self._saved_phase
+            # Unassigned variables are put back in the queue unless
+            # they are still in it
+            add = self._priority_queue.add if self._priority_queue is not None else None
+            start = self._trail_lim[backtrack_level]
+            if self._chrono is None:
+                for itr in range(len(trail) - 1, start - 1, -1):
+                    var = trail[itr] >> 1
+                    saved_phase[var] = values[var]
+                    values[var] = -1
+                    if add:
+                        add(var)
+                del trail[start:]
+            else:
+                # Literals of lower levels placed above start by
+                # chronological backtracking stay, in trail order
+                levels = self._levels
+                kept = []
+                for itr in range(start, len(trail)):
+                    lit = trail[itr]
+                    var = lit >> 1
+                    if levels[var] <= backtrack_level:
+                        kept.append(lit)
+                        continue
+                    saved_phase[var] = values[var]
+                    values[var] = -1
+                    if add:
+                        add(var)
+                del trail[start:]
+                trail_pos = self._trail_pos
+                for lit in kept:
+                    trail_pos[lit >> 1] = len(trail)
+                    trail.append(lit)
+            del self._trail_lim[backtrack_level:]
+            # The kept literals are propagated again, to restore the
+            # watches of the clauses which lost their higher literals
+            self._bin_qhead = self._qhead = start
+
+        if literal_to_add != -1:
+            self._assign(literal_to_add,
+                         backtrack_level if literal_level is None else literal_level, reason)
+            self.stats._num_implications += 1
 
-            if self._is_log:
-                print("Backtracking to level ", backtrack_level)
-                print("Node after backtrack ", node)
-            return backtrack_level, node
+    def _missed_implication(self, conflict_clause_id):
+        """
+        With chronological backtracking, the literals of a conflicting
+        clause can all be of levels below the current one: the solver
+        first backtracks to the highest of them, the conflict level, at
+        which conflict analysis works. If a single literal is of the
+        conflict level, the clause is a missed implication instead: that
+        literal is unassigned and implied at the highest level of the
+        other ones.
+
+        Return:
+            True if the clause was a missed implication, False if it is a
+            conflict to analyze at the current level
+        """
+        arena = self._arena
+        cref = conflict_clause_id
+        levels = self._levels
+        conflict_level = -1
+        implied_level = 0
+        count = 0
+        index = 0
+        for k in range(arena[cref + CLAUSE_SIZE]):
+            level = levels[arena[cref + k] >> 1]
+            if level > conflict_level:
+                implied_level = max(implied_level, conflict_level)
+                conflict_level = level
+                count = 1
+                index = k
+            elif level == conflict_level:
+                count += 1
+            elif level > implied_level:
+                implied_level = level
+        if conflict_level < self._level:
+            self._backtrack(conflict_level, -1, -1)
+        if count > 1 or conflict_level == 0:
+            return False
+
+        # The implied literal goes first and stays watched
+        literal = arena[cref + index]
+        if index >= 2:
+            watch_list = self._watches[arena[cref]]
+            for i in range(0, len(watch_list), 2):
+                if watch_list[i] == cref:
+                    del watch_list[i:i + 2]
+                    break
+            self._watches[literal].extend((cref, arena[cref + 1]))
+            arena[cref + index] = arena[cref]
+        elif index == 1:
+            arena[cref + 1] = arena[cref]
+        arena[cref] = literal
+        self._backtrack(conflict_level - 1, literal, cref, implied_level)
+        return True
+
+    def _reduce_learned_clauses(self):
+        """
+        Delete the worse half of the learned clauses, ordered by LBD and
+        then by activity. Clauses with LBD at most 2 and clauses that are
+        the reason of an assignment on the trail are always kept. The
+        arena is compacted when the deleted clauses take more than
+        GARBAGE_FRACTION of it.
+        """
+        arena = self._arena
+        values = self._values
+        reasons = self._reasons
+
+        candidates = []
+        kept = []
+        for cref in self._learned_clauses:
+            var = arena[cref] >> 1
+            if arena[cref + CLAUSE_LBD] <= 2 or (values[var] != -1 and reasons[var] == cref):
+                kept.append(cref)
+            else:
+                candidates.append(cref)
+        candidates.sort(key=lambda c: (-arena[c + CLAUSE_LBD], arena[c + CLAUSE_ACTIVITY]))
+        num_deleted = len(candidates) // 2
+        kept.extend(candidates[num_deleted:])
+
+        # Mark the deleted clauses and detach them from the watch lists of
+        # their two watched literals
+        watched = set()
+        for cref in candidates[:num_deleted]:
+            if self._proof is not None:
+                self._proof.delete(self._clause_literals(cref))
+            watched.add(arena[cref])
+            watched.add(arena[cref + 1])
+            arena[cref + CLAUSE_FLAGS] |= DELETED
+            self._wasted += HEADER_SIZE + arena[cref + CLAUSE_SIZE]
+        for lit in watched:
+            watch_list = self._watches[lit]
+            j = 0
+            for i in range(0, len(watch_list), 2):
+                if not arena[watch_list[i] + CLAUSE_FLAGS] & DELETED:
+                    watch_list[j] = watch_list[i]
+                    watch_list[j + 1] = watch_list[i + 1]
+                    j += 2
+            del watch_list[j:]
+
+        for cref in kept:
+            arena[cref + CLAUSE_ACTIVITY] >>= 1
+        self._learned_clauses = array("i", kept)
+        self._num_clauses -= num_deleted
+        self.stats._num_deleted_clauses += num_deleted
+        if self._is_log:
+            print("Deleted learned clauses: ", num_deleted)
+        if self._wasted > GARBAGE_FRACTION * len(arena):
+            self._compact_arena()
+
+    def _compact_arena(self):
+        """
+        Move the clauses which are not deleted down over the deleted ones,
+        in place, then update the references held by the watch lists, the
+        implication lists, the reasons of the assigned variables and the
+        list of learned clauses.
+        """
+        arena = self._arena
+        # References of the moved clauses before and after the move, both
+        # increasing
+        old_refs = array("i")
+        new_refs = array("i")
+        position = 0
+        start = 0
+        while start < len(arena):
+            cref = start + HEADER_SIZE
+            end = cref + arena[cref + CLAUSE_SIZE]
+            if not arena[cref + CLAUSE_FLAGS] & DELETED:
+                if position != start:
+                    arena[position:position + end - start] = arena[start:end]
+                    old_refs.append(cref)
+                    new_refs.append(position + HEADER_SIZE)
+                position += end - start
+            start = end
+        del arena[position:]
+        self._wasted = 0
+        self.stats._num_compactions += 1
+        if not old_refs:
+            return
+
+        # Every clause after the first moved one has moved
+        first = old_refs[0]
+        for watch_list in self._watches:
+            for i in range(0, len(watch_list), 2):
+                if watch_list[i] >= first:
+                    watch_list[i] = new_refs[bisect_left(old_refs, watch_list[i])]
+        for implications in self._binaries:
+            for i in range(1, len(implications), 2):
+                if implications[i] >= first:
+                    implications[i] = new_refs[bisect_left(old_refs, implications[i])]
+        reasons = self._reasons
+        for lit in self._trail:
+            var = lit >> 1
+            if reasons[var] >= first:
+                reasons[var] = new_refs[bisect_left(old_refs, reasons[var])]
+        learned_clauses = self._learned_clauses
+        for i in range(len(learned_clauses)):
+            if learned_clauses[i] >= first:
+                learned_clauses[i] = new_refs[bisect_left(old_refs, learned_clauses[i])]
+
+    def _update_target_phase(self):
+        # Called before backjumping, while the trail is at its largest
+        trail_size = len(self._trail)
+        if trail_size > self._target_size:
+            self._target_size = trail_size
+            self._target_phase[:] = self._values
+        if trail_size > self._best_size:
+            self._best_size = trail_size
+            self._best_phase[:] = self._values
+
+    def _rephase_phases(self):
+        """
+        Reset the saved phases to the best, original or inverted original
+        phases, following REPHASE_CYCLE, and forget the target phases.
+        """
+        mode = REPHASE_CYCLE[self._rephase_count % len(REPHASE_CYCLE)]
+        self._rephase_count += 1
+        saved_phase = self._saved_phase
+        if mode == "BEST":
+            best_phase = self._best_phase
+            for var in range(1, self._num_vars + 1):
+                if best_phase[var] != -1:
+                    saved_phase[var] = best_phase[var]
+        elif mode == "ORIGINAL":
+            saved_phase[:] = self._original_phase
         else:
-            literal = conflict_clause[0]
-            var = self._get_literal_var(literal)
-            is_negative_literal = self._is_negative_literal(literal)
-
-            assigned_node = self._nodes_variable[var]
-            backtrack_level = 0
-
-            value_to_set = True
-            if is_negative_literal:
-                value_to_set = False
-            node = AssignedNode(var, value_to_set, backtrack_level, None)
-            return backtrack_level, node
-
-    def _backtrack(self, backtrack_level, node_to_add):
-        self._level = backtrack_level
-        itr = len(self._stack_of_decision) - 1
-        while True:
-            if itr < 0:
+            original_phase = self._original_phase
+            for var in range(1, self._num_vars + 1):
+                saved_phase[var] = 1 - original_phase[var]
+        self._best_size = 0
+        self._target_size = 0
+        self._target_phase[:] = array("b", [-1]) * (self._num_vars + 1)
+        if self._is_log:
+            print("Rephasing to the phases: ", mode)
+
+    def _restart(self):
+        self._restart_policy.on_restart()
+        self._target_size = 0
+        if self._level > 0:
+            self.stats._num_restarts += 1
+            interval = self.stats._num_conflicts - self._restart_conflicts
+            self._restart_conflicts = self.stats._num_conflicts
+            self.stats._restart_histogram[min(interval.bit_length(), HISTOGRAM_SIZE)] += 1
+            if self._is_log:
+                print("Restarting")
+            level = self._reused_level()
+            if level:
+                self.stats._num_reused_trails += 1
+                self.stats._num_reused_levels += level
+            self._backtrack(level, -1, -1)
+
+    def _reused_level(self):
+        """
+        Trail reuse: the decision levels to keep at a restart, those
+        whose decision variable is more active than the variable VSIDS
+        would decide next, since the same decisions would be made again.
+
+        Return:
+            the level to restart at, 0 without trail reuse
+        """
+        queue = self._priority_queue
+        # Clauses are imported at level 0 after restarts
+        if not self._reuse_trail or queue is None or self._clause_import is not None:
+            return 0
+        values = self._values
+        while queue.size and values[queue.heap[0]] != -1:
+            queue.get_top()
+        if not queue.size:
+            return 0
+        activity = queue.activity
+        next_activity = activity[queue.heap[0]]
+        trail = self._trail
+        trail_lim = self._trail_lim
+        levels = self._levels
+        reasons = self._reasons
+        level = 0
+        while level < self._level:
+            position = trail_lim[level]
+            if position >= len(trail):
                 break
-            if self._stack_of_decision[itr].level <= backtrack_level:
+            var = trail[position] >> 1
+            # Levels opened for assumptions which were already true have
+            # no decision
+            if levels[var] != level + 1 or reasons[var] != -1 or activity[var] < next_activity:
                 break
-            else:
-                del self._nodes_variable[self._stack_of_decision[itr].var]
-
-                node = self._stack_of_decision.pop(itr)
-
-                if self._decider == "VSIDS":
-                    self._priority_queue.add(node.var, self._lit_scores[node.var])
-                    self._priority_queue.add(node.var + self._num_vars, self._lit_scores[node.var + self._num_vars])
-
-                del node
-                itr -= 1
-
-        if node_to_add:
-            self._nodes_variable[node_to_add.var] = node_to_add
-            self._stack_of_decision.append(node_to_add)
-            node_to_add.index = len(self._stack_of_decision) - 1
-
-            if self._decider == "VSIDS":
-                self._priority_queue.remove(node_to_add.var)
-                self._priority_queue.remove(node_to_add.var + self._num_vars)
-
-            self.stats._num_implications += 1
+            level += 1
+        return level
+
+    def _search(self, assumptions):
+        """
+        CDCL search under the given assumptions, which are decided first,
+        one per decision level. The solver is back at level 0 afterwards,
+        so clauses can be added before the next call.
+
+        Parameters:
+            assumptions: list of internal literals assumed to be true
+
+        Return:
+            "SAT", "UNSAT", or "UNKNOWN" when stopped by a limit or an
+            interruption, whose reason is stored in the statistics
+        """
+        self._model = None
+        self._failed_assumptions = []
+        if not self._ok:
+            return "UNSAT"
+        self._init_decider()
+        values = self._values
+        stats = self.stats
+        phase_times = stats._phase_times
+        clock = time.perf_counter
+        limited = (self._conflict_limit is not None or self._propagation_limit is not None
+                   or self._deadline is not None or self._memory_limit is not None)
+        if self._interrupted:
+            self._interrupted = False
+            stats._stop_reason = "interrupt"
+            return "UNKNOWN"
+        while True:
+            start = clock()
+            conflict_clause_id = self._unit_propagate()
+            end = clock()
+            phase_times["propagate"] += end - start
+
+            if conflict_clause_id != -1:
+                stats._num_conflicts += 1
+                if self._chrono is not None and self._missed_implication(conflict_clause_id):
+                    phase_times["backtrack"] += clock() - end
+                    if (limited or self._interrupted) and self._stop_search():
+                        return "UNKNOWN"
+                    continue
+                backtrack_level, literal_to_add, reason, lbd = self._analyze_conflict(conflict_clause_id)
+
+                if backtrack_level == -1:
+                    self._ok = False
+                    if self._proof is not None:
+                        self._proof.add([])
+                    return "UNSAT"
+
+                if self._proof is not None:
+                    self._proof.add([literal_to_add] if reason == -1
+                                    else self._clause_literals(reason))
+                size = 1 if reason == -1 else self._arena[reason + CLAUSE_SIZE]
+                stats._learned_size_histogram[min(size, HISTOGRAM_SIZE)] += 1
+                stats._lbd_histogram[min(lbd, HISTOGRAM_SIZE)] += 1
+                if self._clause_export is not None:
+                    self._export_clause(literal_to_add, reason, lbd)
+                self._restart_policy.on_conflict(lbd, len(self._trail))
+                if self._rephase:
+                    self._update_target_phase()
+                start = clock()
+                phase_times["analyze"] += start - end
+                if (self._chrono is not None and reason != -1
+                        and self._level - backtrack_level > self._chrono):
+                    # Only undo the conflict level, the asserting literal
+                    # still gets the backjump level
+                    stats._num_chrono_backtracks += 1
+                    self._backtrack(self._level - 1, literal_to_add, reason, backtrack_level)
+                else:
+                    self._backtrack(backtrack_level, literal_to_add, reason)
+                phase_times["backtrack"] += clock() - start
+                if (self._progress_interval is not None and stats._num_conflicts & 127 == 0
+                        and time.time() >= self._next_progress):
+                    self._report_progress()
+                if (limited or self._interrupted) and self._stop_search():
+                    return "UNKNOWN"
+                continue
+
+            if self._restart_policy.should_restart():
+                self._restart()
+                phase_times["backtrack"] += clock() - end
+                if self._clause_import is not None:
+                    self._import_clauses()
+                    if not self._ok:
+                        return "UNSAT"
+                    # Propagate the imported clauses at level 0
+                    continue
+            if self._rephase and stats._num_conflicts >= self._next_rephase:
+                self._rephase_interval += 1000
+                self._next_rephase += self._rephase_interval
+                self._rephase_phases()
+            if stats._num_conflicts >= self._next_reduce:
+                self._reduce_interval += 300
+                self._next_reduce += self._reduce_interval
+                start = clock()
+                self._reduce_learned_clauses()
+                phase_times["reduce"] += clock() - start
+
+            # Decide the next assumption, opening an empty level for the
+            # assumptions which are already true
+            start = clock()
+            next_literal = -1
+            while self._level < len(assumptions):
+                literal = assumptions[self._level]
+                value = values[literal >> 1] ^ (literal & 1)
+                if value == 1:
+                    self._level += 1
+                    self._trail_lim.append(len(self._trail))
+                elif value == 0:
+                    self._failed_assumptions = self._analyze_final(literal)
+                    self._backtrack(0, -1, -1)
+                    return "UNSAT"
+                else:
+                    next_literal = literal
+                    break
 
-    def solve(self, cnf_filename):
-        self.stats._input_file = cnf_filename
+            if next_literal != -1:
+                self._new_decision(next_literal)
+            elif self._decide() == -1:
+                self._model = array("b", values)
+                self._backtrack(0, -1, -1)
+                return "SAT"
+            phase_times["decide"] += clock() - start
+            # A search without conflicts still stops at the limits
+            if (limited or self._interrupted) and self._stop_search():
+                return "UNKNOWN"
+
+    def solve(self, cnf_filename=None, use_cache=True, assumptions=None):
+        """
+        Solve the clauses read from cnf_filename, if given, together with
+        the clauses added before. Learned clauses and the heuristic state
+        are kept, so solve can be called again after adding clauses.
+        Nothing is printed or written; see solve_file for that.
+
+        Parameters:
+            cnf_filename: optional path of a DIMACS file to read first
+            use_cache: whether to load a fresh binary cache of the file
+            assumptions: DIMACS literals assumed true for this call only
+
+        Return:
+            "SAT", "UNSAT", or "UNKNOWN" when stopped by a limit (see
+            set_limits) or by interrupt
+        """
         self.stats._start_time = time.time()
-        self._read_file(cnf_filename)
+        self.stats._stop_reason = ""
+        self._start_limits(self.stats._start_time)
+        assumptions = list(assumptions or [])
+        if cnf_filename is not None:
+            self.stats._input_file = cnf_filename
+            self._frozen_vars = [abs(lit) for lit in assumptions]
+            self._read_file(cnf_filename, use_cache)
         self.stats._read_time = time.time()
 
         self.stats._num_vars = self._num_vars
         self.stats._num_clauses = self._num_clauses
-        if self.stats._result == "UNSAT":
-            self.stats._complete_time = time.time()
-        else:
-            first_time = True
-            while True:
-                while True:
-                    result = self._unit_propagate(first_time)
+        self._check_not_eliminated(assumptions)
+        if assumptions:
+            self._ensure_vars(max(map(abs, assumptions)))
+        if self._progress_interval is not None:
+            self._next_progress = time.time() + self._progress_interval
+        self.stats._result = self._search([to_literal(lit) for lit in assumptions])
+        # An interruption arriving after the end of the search is dropped
+        self._interrupted = False
+        if self.stats._result == "SAT" and self._original_literals is not None:
+            self._verify_model()
+        self.stats._complete_time = time.time()
+        self.stats._arena_size = len(self._arena)
+        self._copy_heap_stats()
+        return self.stats._result
+
+
+def _memory_usage():
+    # Resident set size of the process in bytes, or its peak where /proc
+    # is not available
+    try:
+        with open("/proc/self/statm") as statm_file:
+            return int(statm_file.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class SolveResult:
+    """
+    Outcome of solve_clauses and solve_file.
+    """
 
-                    if result == "NO_CONFLICT":
-                        break
-                    first_time = False
+    def __init__(self, status, model, stats):
+        # "SAT", "UNSAT" or "UNKNOWN"
+        self.status = status
+        # Dictionary of variable to boolean value, None unless SAT
+        self.model = model
+        self.stats = stats
 
-                    backtrack_level, node_to_add = self._analyze_conflict()
+    def __repr__(self):
+        return "SolveResult(status={!r})".format(self.status)
 
-                    if backtrack_level == -1:
-                        print("UNSAT")
-                        self.stats._result = "UNSAT"
-                        self.stats._complete_time = time.time()
-                        break
 
-                    self._backtrack(backtrack_level, node_to_add)
+def _split_flat_clauses(literals):
+    clause = []
+    for lit in literals:
+        if lit == 0:
+            yield clause
+            clause = []
+        else:
+            clause.append(lit)
+    if clause:
+        yield clause
+
+
+def _flat_literals(clauses):
+    # A one-dimensional buffer of native integers (array, memoryview,
+    # NumPy array...) as a memoryview, whose items are Python ints; None
+    # for anything else
+    try:
+        view = memoryview(clauses)
+    except TypeError:
+        return None
+    if view.ndim == 1 and view.format.lstrip("@") in ("b", "B", "h", "H", "i", "I", "l", "L",
+                                                      "q", "Q", "n", "N"):
+        return view
+    return None
+
+
+def solve_clauses(clauses, decider="VSIDS", restart_policy="LUBY", rephase=False,
+                  assumptions=None, log=False, preprocess=False, limits=None, verify=False):
+    """
+    Solve a formula held in memory, without any file or console output.
+
+    Parameters:
+        clauses: iterable of clauses, each an iterable of DIMACS literals,
+                 or a flat sequence of DIMACS literals with every clause
+                 terminated by 0: a list or tuple of ints, or any
+                 one-dimensional buffer of integers (array, memoryview,
+                 NumPy integer array...)
+        decider, restart_policy, rephase, log, preprocess, verify: the
+            options of SAT
+        assumptions: DIMACS literals assumed true
+        limits: dictionary of the arguments of SAT.set_limits
+
+    Return:
+        a SolveResult
+    """
+    sat = SAT(log, decider, restart_policy, rephase, preprocess=preprocess, verify=verify)
+    if limits:
+        sat.set_limits(**limits)
+    literals = _flat_literals(clauses)
+    if literals is not None:
+        clauses = _split_flat_clauses(literals)
+    elif isinstance(clauses, (list, tuple)) and clauses and isinstance(clauses[0], int):
+        clauses = _split_flat_clauses(clauses)
+    if preprocess:
+        sat._frozen_vars = [abs(lit) for lit in assumptions or []]
+        clauses = [list(clause) for clause in clauses]
+        sat._load_clauses(0, len(clauses), clauses)
+    else:
+        for clause in clauses:
+            if not sat.add_clause(clause):
+                break
+    status = sat.solve(assumptions=assumptions)
+    return SolveResult(status, sat.get_model(), sat.stats)
 
-                if self.stats._result == "UNSAT":
-                    break
-                first_time = False
-                var_decided = self._decide()
 
-                if var_decided == -1:
-                    print("SAT")
-                    self.stats._result = "SAT"
-                    self.stats._complete_time = time.time()
-                    break
+def check_model(literals, model, stats):
+    """
+    Check a model against the clauses of a formula, a RuntimeError is
+    raised if one of them is falsified (which would be a bug of the
+    solver).
+
+    Parameters:
+        literals: flat DIMACS literals of the clauses, see verify_model
+        model: dictionary of variable to boolean value
+        stats: Statistics receiving the verification time
+
+    Return:
+        None
+    """
+    start = time.time()
+    index = verify_model(literals, model)
+    stats._verify_time = time.time() - start
+    if index != -1:
+        raise RuntimeError("The model falsifies the clause {} of the formula".format(index))
 
-        if not os.path.isdir("results"):
-            os.mkdir("results")
-        inputfile_basename = os.path.basename(cnf_filename)
-        input_case_name = os.path.splitext(inputfile_basename)[0]
-        self.stats.print_stats()
 
-        if self.stats._result == "SAT":
-            assgn_file_name = "results/decision_" + input_case_name + ".txt"
-            self.stats._output_assignment_file = assgn_file_name
+def write_model_file(cnf_filename, model, output_dir, model_format="dimacs"):
+    """
+    Write a model to output_dir/decision_<name>.txt (.bits for the "bits"
+    format), where name is the base name of the CNF file without its
+    extension.
 
-            assignment_dict = {}
-            for var in self._nodes_variable:
-                assignment_dict[var] = self._nodes_variable[var].value
+    Parameters:
+        model_format: one of MODEL_FORMATS, see write_model
 
-            assgn_file = open(assgn_file_name, "w")
-            assgn_file.write(json.dumps(assignment_dict))
-            assgn_file.close()
+    Return:
+        the path of the written file
+    """
+    if not os.path.isdir(output_dir):
+        os.mkdir(output_dir)
+    inputfile_basename = os.path.basename(cnf_filename)
+    input_case_name = os.path.splitext(inputfile_basename)[0]
+    assgn_file_name = os.path.join(output_dir, "decision_" + input_case_name
+                                   + MODEL_FORMATS[model_format])
+    write_model(assgn_file_name, model, model_format)
+    return assgn_file_name
+
+
+def solve_file(cnf_filename, decider="VSIDS", restart_policy="LUBY", rephase=False,
+               use_cache=True, output_dir=None, verbose=False, log=False, progress=None,
+               proof=None, preprocess=False, limits=None, signals=(), verify=False,
+               model_format="dimacs", chrono=None, reuse_trail=False):
+    """
+    Solve a DIMACS file.
+
+    Parameters:
+        cnf_filename: path of the (possibly compressed) DIMACS file
+        decider, restart_policy, rephase, log, preprocess, verify, chrono,
+            reuse_trail: the options of SAT
+        use_cache: whether to load a fresh binary cache of the file
+        output_dir: if given, the model of a SAT formula is written to
+                    output_dir/decision_<name>.txt
+        model_format: format of the model file, see write_model
+        verbose: whether to print the result and the statistics
+        progress: if given, a progress line is printed every progress
+                  seconds
+        proof: if given, path of the binary DRAT proof to write, see
+               DratWriter
+        limits: dictionary of the arguments of SAT.set_limits
+        signals: signal numbers (e.g. signal.SIGINT) interrupting the
+                 search while solving, which then ends with UNKNOWN and
+                 its statistics; must be called from the main thread
+
+    Return:
+        a SolveResult
+    """
+    sat = SAT(log, decider, restart_policy, rephase, preprocess=preprocess, verify=verify,
+              chrono=chrono, reuse_trail=reuse_trail)
+    if progress is not None:
+        sat.set_progress(progress)
+    if limits:
+        sat.set_limits(**limits)
+    handlers = {signum: signal.signal(signum, lambda signum, frame: sat.interrupt())
+                for signum in signals}
+    try:
+        if proof is not None:
+            with DratWriter(proof) as proof_writer:
+                sat.set_proof(proof_writer)
+                status = sat.solve(cnf_filename, use_cache)
+        else:
+            status = sat.solve(cnf_filename, use_cache)
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+    model = sat.get_model()
+
+    if output_dir is not None and status == "SAT":
+        sat.stats._output_assignment_file = write_model_file(cnf_filename, model, output_dir,
+                                                             model_format)
+
+    if verbose:
+        print(status)
+        sat.stats.print_stats()
+    return SolveResult(status, model, sat.stats)